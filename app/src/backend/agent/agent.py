@@ -8,22 +8,379 @@ suggests updates, and detects duplicates using Claude (via AWS Bedrock) and sema
 import os
 import csv
 import json
-from typing import List, Dict, Any, Tuple, Optional, Literal
+import logging
+import threading
+import time
+import hashlib
+import sqlite3
+import textwrap
+from functools import lru_cache
+from collections import deque, defaultdict, OrderedDict
+from typing import List, Dict, Any, Tuple, Optional, Literal, Iterable, Deque
 from pathlib import Path
+from types import MappingProxyType
 import numpy as np
+import orjson
 from dotenv import load_dotenv
 import sys
-from sentence_transformers import SentenceTransformer
 
 # Add parent to path for imports
 sys.path.append(str(Path(__file__).parent.parent))
 
-from mcp.test_case_server import get_server, handle_tool_call
+from mcp.test_case_server import get_server, handle_tool_call, read_test_cases_csv
 from bedrock_client import get_claude_client, check_bedrock_configured, BedrockClaudeClient
+from agent.embedding_store import EmbeddingStore
+from agent.area_config import AREA_DESCRIPTIONS
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Below this many test cases a dense E @ E.T is faster than a FAISS range search
+FAISS_MIN_TEST_CASES = 2000
+
+# Rows per block when scoring duplicate pairs with dense matrix products
+DUPLICATE_BLOCK_SIZE = 512
+
+# Minimum embedding similarity for a pair of test cases to be sent to Claude as a potential duplicate
+DUPLICATE_SIMILARITY_THRESHOLD = 0.90
+
+# On-disk cache of analyze_bug_report results, keyed by a hash of the inputs
+RESULT_CACHE_DIR = Path('.rad-ai-cache')
+RESULT_CACHE_TTL_SECONDS = 86400
+
+# Embeddings persisted across restarts (override the location with EMBED_CACHE)
+EMBEDDING_CACHE_PATH = Path(os.getenv('EMBED_CACHE', str(RESULT_CACHE_DIR / 'embeddings.sqlite3'))).expanduser()
+
+# Maximum in-memory embeddings kept per cache before least recently used ones are evicted
+EMBEDDING_CACHE_SIZE = 10000
+
+# In-memory cache of recent results, reused for bug reports that are near-duplicates in meaning
+SEMANTIC_CACHE_SIZE = 256
+SEMANTIC_CACHE_THRESHOLD = 0.95
+
+# sentence-transformers loading options per embedding backend. 'onnx-int8' uses one of the
+# dynamically int8-quantized ONNX exports published alongside the model (see
+# ONNX_INT8_FILES). ONNX and OpenVINO models are exported on first load if the model
+# doesn't publish one.
+EMBEDDING_BACKENDS = {
+    'torch': {},
+    'onnx': {'backend': 'onnx'},
+    'onnx-int8': {'backend': 'onnx'},
+    'openvino': {'backend': 'openvino'}
+}
+
+# Quantized ONNX exports by the CPU feature (as reported by numpy) their kernels are built
+# for, best first. Override with EMBEDDING_ONNX_FILE; without a match the fp32 ONNX model is used.
+ONNX_INT8_FILES = (
+    ('AVX512VNNI', 'onnx/model_qint8_avx512_vnni.onnx'),
+    ('AVX512_SKX', 'onnx/model_qint8_avx512.onnx'),
+    ('AVX2', 'onnx/model_quint8_avx2.onnx'),
+    ('ASIMD', 'onnx/model_qint8_arm64.onnx')
+)
+
+# Embedding models: the default transformer, and a static (token lookup + mean pool) model used
+# with EMBED_MODE=fast that encodes far faster at a small cost in quality
+DEFAULT_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+FAST_EMBEDDING_MODEL = 'sentence-transformers/static-retrieval-mrl-en-v1'
+
+# SentenceTransformer.encode options: batched forward passes, unit-length output, no progress bars
+ENCODE_OPTIONS = {
+    'batch_size': 64,
+    'convert_to_numpy': True,
+    'normalize_embeddings': True,
+    'show_progress_bar': False
+}
+
+# Similarity thresholds per strictness level (read-only; unknown levels fall back to 'lenient')
+STRICTNESS_THRESHOLDS = MappingProxyType({
+    'lenient': MappingProxyType({
+        'min_similarity': 0.35,
+        'csv_export': 0.40,
+        'claude_analysis': 0.45
+    }),
+    'moderate': MappingProxyType({
+        'min_similarity': 0.50,
+        'csv_export': 0.50,
+        'claude_analysis': 0.55
+    }),
+    'strict': MappingProxyType({
+        'min_similarity': 0.65,
+        'csv_export': 0.60,
+        'claude_analysis': 0.70
+    })
+})
+
+# Columns of the CSV written by export_results_to_csv, and the write buffer size used for it
+CSV_EXPORT_COLUMNS = (
+    'Test Case ID', 'Title', 'State', 'Area', 'Created Date',
+    'Similarity Score', 'Reasoning', 'Duplicate Classification',
+    'Related Test IDs', 'Suggested Update'
+)
+CSV_WRITE_BUFFER_SIZE = 1 << 20
+
+# System prompt with the product area descriptions. It is the same for every request and
+# sent as its own cached block, which also lengthens the shared prefix past the minimum
+# size Claude will cache.
+SYSTEM_PROMPT = "You review manual test cases for Aderant Expert. The product areas they cover are:\n\n" + "\n\n".join(
+    f"{area}:\n{textwrap.dedent(description).strip()}" for area, description in AREA_DESCRIPTIONS.items()
+)
+SYSTEM_BLOCKS = [{"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+
+# Claude instructions are identical across requests, so they are sent as a cacheable prompt
+# prefix ahead of the per-request bug and test case data
+ANALYSIS_RUBRIC = """1. RELATED_TESTS: Which test cases are most relevant to this bug? For each, explain WHY it's related and assign a confidence score (0-100).
+
+2. SUGGESTED_UPDATES: What changes should be made to existing test cases due to this bug fix? Be specific about which test cases need updates and what should change in their steps or expected results.
+
+3. NEW_TEST_CASES: Are there any gaps in test coverage? Suggest new test cases that should be created to catch this type of bug in the future.
+
+4. DUPLICATE_DETECTION: Do any of these test cases appear to test the same functionality? Identify potential duplicates or overlapping test scenarios."""
+
+ANALYZE_PROMPT = f"""You are an expert QA analyst. Analyze the bug report and the related test cases that follow.
+
+Please analyze and provide:
+
+{ANALYSIS_RUBRIC}
+
+Provide your response in JSON format with these exact keys: related_tests, suggested_updates, new_test_cases, duplicate_tests."""
+
+COMBINED_ANALYSIS_PROMPT = f"""You are an expert QA analyst. Analyze the bug report and the related test cases that follow, then review the pairs of test cases that appear similar based on semantic analysis.
+
+Please analyze and provide:
+
+{ANALYSIS_RUBRIC}
+
+5. DUPLICATE_GROUPS: For each potential duplicate pair, determine whether they are TRUE DUPLICATES (testing exact same functionality), OVERLAPPING (testing similar but slightly different scenarios), or DISTINCT (different despite high similarity score), and recommend consolidation or keeping them separate.
+
+Provide your response in JSON format with these exact keys: related_tests, suggested_updates, new_test_cases, duplicate_tests, duplicate_groups (array of objects with pair_id, classification, reasoning, recommendation)."""
+
+# The combined request answers the bug analysis and every duplicate pair review in one
+# response, so it gets twice the 4096 tokens each separate request had
+COMBINED_ANALYSIS_MAX_TOKENS = 8192
+
+DUPLICATES_PROMPT = """You are a QA expert. Analyze the pairs of test cases that follow, which appear similar based on semantic analysis.
+
+For each pair, determine:
+1. Are they TRUE DUPLICATES (testing exact same functionality)?
+2. Are they OVERLAPPING (testing similar but slightly different scenarios)?
+3. Are they DISTINCT (different despite high similarity score)?
+
+Provide recommendations for consolidation or keeping them separate.
+
+Respond in JSON format with: duplicate_groups (array of objects with pair_id, classification, reasoning, recommendation)."""
+
+
+def _combined_text(test_case: Dict[str, Any]) -> str:
+    """Combine title, description, and steps into the text used to embed a test case."""
+    return f"{test_case['title']} {test_case['description']} {test_case['steps']}"
+
+
+@lru_cache(maxsize=1024)
+def _area_keywords(area: str) -> Optional[Tuple[str, ...]]:
+    """
+    Split a test case area into lowercase keywords (e.g. "Expert\\Disbursements" -> ("expert", "disbursements")).
+    
+    Memoized, since suites have only a handful of distinct areas; test cases in the same
+    area share one keyword tuple. Returns None when the test case has no area, so no
+    boost or penalty applies.
+    """
+    if not area:
+        return None
+    return tuple(area.lower().replace('\\', ' ').replace('/', ' ').split())
+
+
+# Largest boost _area_boost() can add to a similarity score
+AREA_BOOST_MAX = 0.15
+
+
+def _area_boost(area_keywords: Optional[Tuple[str, ...]], bug_text_lower: str) -> float:
+    """
+    Calculate a boost/penalty based on area alignment between a test case and the bug.
+    
+    Args:
+        area_keywords: Keywords from _area_keywords() for the test case's area
+        bug_text_lower: Lowercased bug description and repro steps
+        
+    Returns:
+        Boost value to add to similarity score (can be positive or negative)
+    """
+    if area_keywords is None:
+        return 0.0
+    
+    # Check if bug text mentions any area keywords
+    matches = sum(1 for kw in area_keywords if kw in bug_text_lower)
+    
+    if matches > 0:
+        # Boost if area is mentioned in bug description
+        return min(AREA_BOOST_MAX, matches * 0.08)  # Cap at +0.15 boost
+    else:
+        # Small penalty if area not mentioned (might be cross-domain false positive)
+        return -0.05
+
+
+@lru_cache(maxsize=1)
+def _load_faiss():
+    """Import faiss on first use (it is optional), returning None if it isn't installed."""
+    try:
+        import faiss
+    except ImportError:
+        return None
+    return faiss
+
+
+def _onnx_int8_file_name() -> Optional[str]:
+    """
+    Pick the quantized ONNX export suited to this CPU.
+    
+    Returns:
+        File name within the model repository, or None if no quantized export fits the CPU
+    """
+    override = os.getenv('EMBEDDING_ONNX_FILE')
+    if override:
+        return override
+    try:
+        from numpy._core._multiarray_umath import __cpu_features__
+    except ImportError:
+        try:
+            from numpy.core._multiarray_umath import __cpu_features__  # numpy < 2
+        except ImportError:
+            __cpu_features__ = {}
+    for feature, file_name in ONNX_INT8_FILES:
+        if __cpu_features__.get(feature):
+            return file_name
+    return None
+
+
+def _text_key(text: str) -> bytes:
+    """Return a 128-bit digest of text, used as the embedding cache key."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+def _prompt_json(obj: Any) -> str:
+    """Serialize data for a Claude prompt as 2-space indented JSON."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+
+
+def _trim(text: str, limit: int) -> str:
+    """Truncate text to limit characters, adding an ellipsis only when something was cut."""
+    return text if len(text) <= limit else text[:limit] + '...'
+
+
+def _top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return indices of the k highest scores, best first, without sorting the whole array."""
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.size:
+        indices = np.argpartition(-scores, k - 1)[:k]
+    else:
+        indices = np.arange(scores.size)
+    return indices[np.argsort(-scores[indices], kind='stable')]
+
+
+class _LRUCache(OrderedDict):
+    """OrderedDict that keeps at most maxsize entries, evicting the least recently used."""
+    
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return super().__getitem__(key)
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class _JsonObjectScanner:
+    """
+    Incrementally track brace depth to find where the first top-level JSON object ends.
+    
+    Braces inside JSON strings are ignored, so text can be fed in arbitrary chunks
+    as it streams in.
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+    
+    def feed(self, text: str) -> int:
+        """
+        Consume the next chunk of text.
+        
+        Args:
+            text: Next chunk of the response
+            
+        Returns:
+            Index in text just past the object's closing brace, or -1 if it has not closed yet
+        """
+        for i, char in enumerate(text):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '{':
+                self.depth += 1
+                self.started = True
+            elif not self.started:
+                continue
+            elif char == '"':
+                self.in_string = True
+            elif char == '}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return i + 1
+        return -1
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def parse_claude_json(text: str, default: Any = None) -> Any:
+    """
+    Parse the first top-level JSON object in a Claude response.
+    
+    Decoding starts at the first '{' and stops at the end of that object, so trailing
+    prose (even prose containing braces) is never scanned or copied.
+    
+    Args:
+        text: Raw response text from Claude
+        default: Value returned when no complete, valid JSON object is found
+        
+    Returns:
+        Parsed JSON object, or default
+    """
+    start = text.find('{')
+    if start == -1:
+        return default
+    try:
+        obj, _ = _JSON_DECODER.raw_decode(text, start)
+    except json.JSONDecodeError:
+        return default
+    return obj
+
+
+class AnalysisCancelled(Exception):
+    """Raised when an analysis is cancelled through its cancel_event."""
+
+
+def _raise_if_cancelled(cancel_event: Optional[threading.Event]) -> None:
+    """Raise AnalysisCancelled if the caller has set the cancel event."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise AnalysisCancelled("Analysis cancelled")
+
 
 class TestCaseAgent:
     """
@@ -33,32 +390,120 @@ class TestCaseAgent:
     and sentence transformers for semantic similarity matching.
     """
     
-    def __init__(self, use_mcp: bool = True, embedding_model: str = 'all-MiniLM-L6-v2'):
+    def __init__(
+        self,
+        use_mcp: bool = True,
+        embedding_model: Optional[str] = None,
+        persist_embeddings: bool = True,
+        embedding_backend: Optional[str] = None,
+        torch_threads: Optional[int] = None,
+        verbose: Optional[bool] = None
+    ):
         """
         Initialize the agent with necessary models and configurations.
         
         Args:
             use_mcp: Whether to use MCP server for test case access (default: True)
-            embedding_model: Name of sentence-transformers model to use (default: 'all-MiniLM-L6-v2')
+            embedding_model: Name of sentence-transformers model to use (default: 'all-MiniLM-L6-v2',
+                or FAST_EMBEDDING_MODEL when the EMBED_MODE env var is 'fast')
+            persist_embeddings: Keep embeddings in an on-disk cache across restarts (default: True)
+            embedding_backend: 'torch', 'onnx', 'onnx-int8' or 'openvino' (default: EMBEDDING_BACKEND env var, or 'torch')
+            torch_threads: CPU threads for the embedding model (default: RAD_AI_TORCH_THREADS env var, or 4).
+                Capped so encoding doesn't oversubscribe cores shared with the API's worker threads.
+            verbose: True logs per-request progress (INFO), False only warnings; sets this module's
+                logger level (default: None, leaving it to the application's logging configuration)
         """
+        if embedding_model is None:
+            fast = os.getenv('EMBED_MODE', '').lower() == 'fast'
+            embedding_model = FAST_EMBEDDING_MODEL if fast else DEFAULT_EMBEDDING_MODEL
+        embedding_backend = embedding_backend or os.getenv('EMBEDDING_BACKEND', 'torch')
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {embedding_backend}")
+        
         if not check_bedrock_configured():
             raise ValueError("AWS_BEARER_TOKEN_BEDROCK not configured")
         
         self.client: BedrockClaudeClient = get_claude_client()
+        if verbose is not None:
+            logger.setLevel(logging.INFO if verbose else logging.WARNING)
         
         # MCP integration
         self.use_mcp = use_mcp
         self.mcp_server = get_server() if use_mcp else None
         
-        # Initialize sentence transformer for better embeddings
-        print(f"Loading embedding model: {embedding_model}...")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        # Initialize sentence transformer for better embeddings. Imported here rather than at
+        # module level because loading sentence-transformers (and torch) takes seconds.
+        import torch
+        import sentence_transformers
+        from sentence_transformers import SentenceTransformer
+        
+        torch.set_num_threads(torch_threads or int(os.getenv('RAD_AI_TORCH_THREADS', '4')))
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Can only be set once per process, before any inter-op work (e.g. a second agent)
+        
+        backend_options = dict(EMBEDDING_BACKENDS[embedding_backend])
+        if embedding_backend == 'onnx-int8':
+            onnx_file = _onnx_int8_file_name()
+            if onnx_file is None:
+                logger.warning("No quantized ONNX model for this CPU, using the fp32 ONNX model")
+                embedding_backend = 'onnx'
+            else:
+                backend_options['model_kwargs'] = {'file_name': onnx_file}
+                # Exports quantized for different CPUs give slightly different vectors
+                embedding_backend = f"onnx-int8:{onnx_file}"
         
-        # Cache for embeddings
-        self.embeddings_cache = {}
+        logger.info("Loading embedding model: %s (%s)...", embedding_model, embedding_backend)
+        try:
+            self.embedding_model = SentenceTransformer(embedding_model, **backend_options)
+        except Exception as e:
+            if not embedding_backend.startswith('onnx-int8'):
+                raise
+            logger.warning("Could not load quantized ONNX model (%s), using the fp32 ONNX model", e)
+            embedding_backend = 'onnx'
+            self.embedding_model = SentenceTransformer(embedding_model, **EMBEDDING_BACKENDS['onnx'])
+        
+        # Identifies the vectors this model produces, for the embedding store and result cache keys
+        self._model_namespace = f"{embedding_model}@{sentence_transformers.__version__}/{embedding_backend}"
+        
+        # Cache for embeddings (already L2-normalized by ENCODE_OPTIONS, so cosine similarity is a
+        # plain dot product), keyed by a digest of the text so long descriptions aren't kept alive
+        # as dict keys. A bounded LRU so long-running services don't grow without limit.
+        self.embeddings_cache: Dict[bytes, np.ndarray] = _LRUCache(EMBEDDING_CACHE_SIZE)
         self.test_cases = []
         
-        print(f"Agent initialized successfully (MCP: {'enabled' if use_mcp else 'disabled'})")
+        # On-disk embedding cache, namespaced by model so vectors from other models are never reused
+        self._embedding_store: Optional[EmbeddingStore] = None
+        if persist_embeddings:
+            try:
+                self._embedding_store = EmbeddingStore(EMBEDDING_CACHE_PATH, self._model_namespace)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Persistent embedding cache disabled: %s", e)
+        
+        # Stacked, L2-normalized test case embeddings (rows aligned with self.test_cases)
+        self._emb_matrix: Optional[np.ndarray] = None
+        self._emb_ids: List[str] = []
+        self._indexed_test_cases: Optional[List[Dict[str, Any]]] = None
+        
+        # Combined texts built once per load (rows aligned with the matrix), found by object identity
+        self._tc_texts: List[str] = []
+        self._tc_rows: Dict[int, int] = {}
+        # Distinct area keyword sets, and each test case's position in that list
+        self._area_groups: List[Optional[Tuple[str, ...]]] = []
+        self._tc_area_ids: np.ndarray = np.empty(0, dtype=np.intp)
+        self._scores_buf: Optional[np.ndarray] = None
+        self._faiss_index = None
+        
+        # Content hash of the loaded test cases, computed lazily for the result cache
+        self._tc_version: Optional[str] = None
+        
+        # Recent results as (normalized bug embedding, parameter key, results), least recently used first
+        self._bug_cache: Deque[Tuple[np.ndarray, str, Dict[str, Any]]] = deque(maxlen=SEMANTIC_CACHE_SIZE)
+        self._bug_cache_lookups = 0
+        self._bug_cache_hits = 0
+        
+        logger.info("Agent initialized successfully (MCP: %s)", 'enabled' if use_mcp else 'disabled')
         
     def load_test_cases_from_csv(self, csv_path: str) -> List[Dict[str, Any]]:
         """
@@ -73,23 +518,11 @@ class TestCaseAgent:
         Returns:
             List of test case dictionaries
         """
-        test_cases = []
-        
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                test_cases.append({
-                    'id': row.get('ID', ''),
-                    'title': row.get('Title', ''),
-                    'state': row.get('State', ''),
-                    'area': row.get('Area', ''),
-                    'created_date': row.get('Created Date', ''),
-                    'description': row.get('Description', ''),
-                    'steps': row.get('Steps', '')
-                })
+        test_cases = read_test_cases_csv(csv_path)
         
         self.test_cases = test_cases
-        print(f"Loaded {len(test_cases)} test cases")
+        self.compute_test_case_embeddings()
+        logger.info("Loaded %d test cases", len(test_cases))
         return test_cases
     
     def detect_and_load_test_cases(
@@ -118,7 +551,7 @@ class TestCaseAgent:
         # Determine which areas to load
         if force_all or not detection_result['detected_areas']:
             # Load all test cases
-            print("Loading all test cases...")
+            logger.info("Loading all test cases...")
             from agent.area_config import get_all_areas
             areas_to_load = get_all_areas()
         else:
@@ -134,15 +567,19 @@ class TestCaseAgent:
                     areas_to_load.append(detected[1]['area_name'])
             else:
                 # Confidence too low, load all areas
-                print(f"Low confidence detection (confidence: {detected[0]['confidence']:.3f}, matches: {detected[0]['matched_keywords']}), loading all test cases...")
+                logger.info(
+                    "Low confidence detection (confidence: %.3f, matches: %d), loading all test cases...",
+                    detected[0]['confidence'], detected[0]['matched_keywords']
+                )
                 from agent.area_config import get_all_areas
                 areas_to_load = get_all_areas()
         
-        print(f"Loading test cases from: {', '.join(areas_to_load)}")
+        logger.info("Loading test cases from: %s", ', '.join(areas_to_load))
         
         # Load test cases from selected areas
         search_result = self.mcp_server.search_by_area(areas_to_load)
         self.test_cases = search_result['test_cases']
+        self.compute_test_case_embeddings()
         
         return {
             'detection': detection_result,
@@ -159,17 +596,95 @@ class TestCaseAgent:
             text: Text to embed
             
         Returns:
-            Embedding vector as numpy array (384-dimensional semantic embedding)
+            L2-normalized embedding vector as float32 numpy array (384-dimensional with the default model)
         """
-        if text in self.embeddings_cache:
-            return self.embeddings_cache[text]
+        key = _text_key(text)
+        embedding = self.embeddings_cache.get(key)
+        if embedding is not None:
+            return embedding
+        
+        stored = self._load_stored_embeddings([key])
+        if key in stored:
+            return stored[key]
         
         # Use sentence transformer for semantic embeddings
-        embedding = self.embedding_model.encode(text, convert_to_numpy=True)
+        embedding = self.embedding_model.encode(text, **ENCODE_OPTIONS).astype(np.float32, copy=False)
         
-        self.embeddings_cache[text] = embedding
+        self.embeddings_cache[key] = embedding
+        self._save_stored_embeddings([(key, embedding)])
         return embedding
     
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Get embedding vectors for many texts, encoding all uncached texts in a single batch.
+        
+        Batching lets sentence transformers run the model over padded batches instead of
+        one forward pass per text.
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            Array of shape (len(texts), embedding_dim) with rows in the order of texts
+        """
+        keys = [_text_key(text) for text in texts]
+        # Collected locally: a batch larger than the LRU can evict its own earlier entries
+        vectors = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            vector = self.embeddings_cache.get(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                vectors[key] = vector
+        if missing:
+            stored = self._load_stored_embeddings(list(missing))
+            vectors.update(stored)
+            for key in stored:
+                del missing[key]
+        if missing:
+            encoded = self.embedding_model.encode(
+                list(missing.values()), **ENCODE_OPTIONS
+            ).astype(np.float32, copy=False)
+            vectors.update(zip(missing, encoded))
+            self.embeddings_cache.update(zip(missing, encoded))
+            self._save_stored_embeddings(zip(missing, encoded))
+        
+        if not texts:
+            return np.empty((0, self.embedding_model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack([vectors[key] for key in keys])
+    
+    def _load_stored_embeddings(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Fetch embeddings from the on-disk cache into the in-memory cache.
+        
+        Args:
+            keys: Text digests missing from the in-memory cache
+            
+        Returns:
+            Dictionary of the keys that were found on disk
+        """
+        if self._embedding_store is None:
+            return {}
+        try:
+            stored = self._embedding_store.get_many(keys)
+        except sqlite3.Error as e:
+            logger.warning("Could not read persistent embedding cache: %s", e)
+            return {}
+        self.embeddings_cache.update(stored)
+        return stored
+    
+    def _save_stored_embeddings(self, items: Iterable[Tuple[bytes, np.ndarray]]) -> None:
+        """Write newly computed (key, embedding) pairs to the on-disk cache, if enabled."""
+        if self._embedding_store is None:
+            return
+        try:
+            self._embedding_store.put_many(items)
+        except sqlite3.Error as e:
+            logger.warning("Could not write persistent embedding cache: %s", e)
+    
     def _calculate_area_similarity_boost(self, test_case: Dict[str, Any], bug_text: str) -> float:
         """
         Calculate a boost/penalty based on area alignment between test case and bug.
@@ -181,70 +696,199 @@ class TestCaseAgent:
         Returns:
             Boost value to add to similarity score (can be positive or negative)
         """
-        test_area = test_case.get('area', '').lower()
-        bug_text_lower = bug_text.lower()
-        
-        if not test_area:
-            return 0.0
+        return _area_boost(_area_keywords(test_case.get('area', '')), bug_text.lower())
+    
+    def _get_strictness_thresholds(self, strictness: str) -> Dict[str, float]:
+        """
+        Get similarity thresholds based on strictness level.
         
-        # Extract area keywords (e.g., "Expert\Disbursements" -> ["expert", "disbursements"])
-        area_keywords = [kw.strip() for kw in test_area.replace('\\', ' ').replace('/', ' ').split()]
+        Args:
+            strictness: 'lenient', 'moderate', or 'strict'
+            
+        Returns:
+            Dictionary with threshold values (a copy, safe to include in results)
+        """
+        return dict(STRICTNESS_THRESHOLDS.get(strictness, STRICTNESS_THRESHOLDS['lenient']))
+    
+    def compute_test_case_embeddings(self) -> np.ndarray:
+        """
+        Compute embeddings for all test cases as a single stacked matrix.
         
-        # Check if bug text mentions any area keywords
-        matches = sum(1 for kw in area_keywords if kw and kw in bug_text_lower)
+        Rows are L2-normalized and aligned with self.test_cases, so cosine similarity
+        against a normalized query is a single matrix-vector product.
         
-        if matches > 0:
-            # Boost if area is mentioned in bug description
-            return min(0.15, matches * 0.08)  # Cap at +0.15 boost
+        Returns:
+            Array of shape (num_test_cases, embedding_dim)
+        """
+        # Combine title, description, and steps for comprehensive embedding
+        self._tc_texts = [_combined_text(tc) for tc in self.test_cases]
+        self._tc_rows = {id(tc): row for row, tc in enumerate(self.test_cases)}
+        group_ids = {}
+        self._tc_area_ids = np.fromiter(
+            (group_ids.setdefault(_area_keywords(tc.get('area', '')), len(group_ids)) for tc in self.test_cases),
+            dtype=np.intp,
+            count=len(self.test_cases)
+        )
+        self._area_groups = list(group_ids)
+        
+        if self.test_cases:
+            # Normalize the batch directly: suites larger than the LRU would otherwise re-encode
+            # rows evicted from the per-text caches
+            matrix = self.embed_batch(self._tc_texts)
+            norms = np.sqrt(np.einsum('ij,ij->i', matrix, matrix))
+            self._emb_matrix = matrix / np.maximum(norms, 1e-12)[:, None]
         else:
-            # Small penalty if area not mentioned (might be cross-domain false positive)
-            return -0.05
+            self._emb_matrix = np.empty(
+                (0, self.embedding_model.get_sentence_embedding_dimension()), dtype=np.float32
+            )
+        self._emb_ids = [tc['id'] for tc in self.test_cases]
+        self._indexed_test_cases = self.test_cases
+        self._tc_version = None
+        
+        # Reused by find_similar_test_cases so each query doesn't allocate a new scores array
+        self._scores_buf = np.empty(len(self.test_cases), dtype=self._emb_matrix.dtype)
+        self._faiss_index = None
+        return self._emb_matrix
     
-    def _get_strictness_thresholds(self, strictness: str) -> Dict[str, float]:
+    def invalidate_embeddings(self) -> None:
         """
-        Get similarity thresholds based on strictness level.
+        Drop the cached test case embedding matrix.
+        
+        Reassigning self.test_cases (or reloading via the loaders) is detected automatically;
+        call this after mutating self.test_cases in place.
+        """
+        self._emb_matrix = None
+        self._emb_ids = []
+        self._indexed_test_cases = None
+        self._tc_texts = []
+        self._tc_rows = {}
+        self._area_groups = []
+        self._tc_area_ids = np.empty(0, dtype=np.intp)
+        self._scores_buf = None
+        self._faiss_index = None
+        self._tc_version = None
+    
+    def _get_combined_text(self, test_case: Dict[str, Any]) -> str:
+        """
+        Get the embedding text for a test case, reusing the string built at load time.
         
         Args:
-            strictness: 'lenient', 'moderate', or 'strict'
+            test_case: Test case dictionary
             
         Returns:
-            Dictionary with threshold values
-        """
-        thresholds = {
-            'lenient': {
-                'min_similarity': 0.35,
-                'csv_export': 0.40,
-                'claude_analysis': 0.45
-            },
-            'moderate': {
-                'min_similarity': 0.50,
-                'csv_export': 0.50,
-                'claude_analysis': 0.55
-            },
-            'strict': {
-                'min_similarity': 0.65,
-                'csv_export': 0.60,
-                'claude_analysis': 0.70
-            }
-        }
+            Combined title, description, and steps text
+        """
+        row = self._index_row(test_case)
+        if row is not None:
+            return self._tc_texts[row]
+        return _combined_text(test_case)
+    
+    def _index_row(self, test_case: Dict[str, Any]) -> Optional[int]:
+        """Return the test case's row in the embedding matrix, or None if it isn't indexed."""
+        row = self._tc_rows.get(id(test_case))
+        if row is not None and self._indexed_test_cases[row] is test_case:
+            return row
+        return None
+    
+    def _get_test_case_matrix(self) -> np.ndarray:
+        """Return the test case embedding matrix, rebuilding it only if the test cases changed."""
+        if self._emb_matrix is None or self._indexed_test_cases is not self.test_cases:
+            self.compute_test_case_embeddings()
+        return self._emb_matrix
+    
+    def _test_cases_version(self) -> str:
+        """Return a content hash of the loaded test cases, recomputed only after a reload."""
+        self._get_test_case_matrix()
+        if self._tc_version is None:
+            payload = orjson.dumps(self.test_cases, option=orjson.OPT_SORT_KEYS)
+            self._tc_version = hashlib.sha256(payload).hexdigest()
+        return self._tc_version
+    
+    def _result_cache_key(self, *parts: Any) -> str:
+        """
+        Build the result cache key for an analysis run.
         
-        return thresholds.get(strictness, thresholds['lenient'])
+        Args:
+            parts: Every input that affects the analysis result
+            
+        Returns:
+            Hex digest identifying the inputs together with the embedding model, Claude model
+            and loaded test cases
+        """
+        text = '\x00'.join(
+            str(part) for part in (*parts, self._model_namespace, self.client.model_id, self._test_cases_version())
+        )
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def _load_cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached analysis result, or None if it is missing or older than the TTL."""
+        path = RESULT_CACHE_DIR / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > RESULT_CACHE_TTL_SECONDS:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
     
-    def compute_test_case_embeddings(self) -> Dict[str, np.ndarray]:
+    def _store_cached_result(self, key: str, results: Dict[str, Any]) -> None:
+        """Write an analysis result to the cache, ignoring failures (the cache is best effort)."""
+        path = RESULT_CACHE_DIR / f"{key}.json"
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            RESULT_CACHE_DIR.mkdir(exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not cache analysis result: %s", e)
+    
+    def _find_semantic_cache_hit(self, bug_embedding: np.ndarray, params_key: str) -> Optional[Dict[str, Any]]:
         """
-        Compute embeddings for all test cases.
+        Find a recent result for a bug report that means nearly the same as this one.
         
+        Args:
+            bug_embedding: Normalized embedding of the bug description and repro steps
+            params_key: Result cache key of every other input (code changes, settings, test cases)
+            
         Returns:
-            Dictionary mapping test case IDs to their embeddings
+            Cached results if one scores at least SEMANTIC_CACHE_THRESHOLD, otherwise None
         """
-        embeddings = {}
+        self._bug_cache_lookups += 1
+        # Deque positions of the matching entries; entries hold arrays, so never compare them with ==
+        positions = [idx for idx, entry in enumerate(self._bug_cache) if entry[1] == params_key]
+        if not positions:
+            return None
+        
+        scores = np.vstack([self._bug_cache[idx][0] for idx in positions]) @ bug_embedding
+        best = int(np.argmax(scores))
+        if scores[best] < SEMANTIC_CACHE_THRESHOLD:
+            return None
         
-        for tc in self.test_cases:
-            # Combine title, description, and steps for comprehensive embedding
-            combined_text = f"{tc['title']} {tc['description']} {tc['steps']}"
-            embeddings[tc['id']] = self.get_embedding(combined_text)
+        # Move to the most recently used end so it survives eviction
+        entry = self._bug_cache[positions[best]]
+        del self._bug_cache[positions[best]]
+        self._bug_cache.append(entry)
+        self._bug_cache_hits += 1
+        logger.info(
+            "Semantic cache hit (similarity %.3f, hit rate %d/%d)",
+            scores[best], self._bug_cache_hits, self._bug_cache_lookups
+        )
+        return entry[2]
+    
+    def _get_faiss_index(self):
+        """
+        Return a FAISS inner-product index over the test case matrix, built once per load.
         
-        return embeddings
+        Returns:
+            The index, or None for suites below FAISS_MIN_TEST_CASES or when faiss isn't installed
+        """
+        if self._faiss_index is None and len(self.test_cases) >= FAISS_MIN_TEST_CASES:
+            faiss = _load_faiss()
+            if faiss is not None:
+                self._faiss_index = faiss.IndexFlatIP(self._emb_matrix.shape[1])
+                self._faiss_index.add(self._emb_matrix)
+        return self._faiss_index
     
     def find_similar_test_cases(
         self,
@@ -269,45 +913,196 @@ class TestCaseAgent:
         """
         # Combine bug info
         bug_text = f"{bug_description} {repro_steps}"
-        bug_embedding = self.get_embedding(bug_text)
         
-        # Compute test case embeddings
-        tc_embeddings = self.compute_test_case_embeddings()
+        if not self.test_cases:
+            return []
+        
+        tc_matrix = self._get_test_case_matrix()
+        query = self.get_embedding(bug_text)
+        
+        faiss_index = self._get_faiss_index()
+        if faiss_index is not None:
+            # Large suites: fetch only test cases that can still reach min_similarity after
+            # the largest possible area boost (FAISS keeps scores strictly above the radius)
+            radius = min_similarity - AREA_BOOST_MAX if apply_area_boost else min_similarity
+            radius = float(np.nextafter(np.float32(radius), np.float32(-np.inf)))
+            _, scores, rows = faiss_index.range_search(query[None, :], radius)
+            rows = rows.astype(np.intp, copy=False)
+            area_ids = self._tc_area_ids[rows]
+        else:
+            # Cosine similarity against every test case in one matrix-vector product
+            scores = np.matmul(tc_matrix, query, out=self._scores_buf)
+            rows = None
+            area_ids = self._tc_area_ids
+        
+        # Apply area-based boost/penalty in place
+        if apply_area_boost:
+            # Score each distinct area once per query, then gather the boosts by area id
+            bug_text_lower = bug_text.lower()
+            area_boosts = np.array(
+                [_area_boost(keywords, bug_text_lower) for keywords in self._area_groups],
+                dtype=scores.dtype
+            )
+            scores += np.take(area_boosts, area_ids)
+            np.minimum(scores, 1.0, out=scores)  # Cap at 1.0
+        
+        # Only include if above minimum threshold, then sort by similarity and return top k
+        candidates = np.flatnonzero(scores >= min_similarity)
+        ranked = candidates[_top_k_indices(scores[candidates], top_k)]
+        ranked_rows = ranked if rows is None else rows[ranked]
+        return [(self.test_cases[row], float(scores[i])) for row, i in zip(ranked_rows, ranked)]
+    
+    def _summarize_test_cases(self, similar_tests: List[Tuple[Dict[str, Any], float]]) -> List[Dict[str, Any]]:
+        """
+        Build the compact test case summary sent to Claude for bug analysis.
         
-        # Calculate similarities using cosine similarity
-        similarities = []
-        for tc in self.test_cases:
-            tc_embedding = tc_embeddings[tc['id']]
+        Args:
+            similar_tests: List of similar test cases with scores
             
-            # Cosine similarity
-            dot_product = np.dot(bug_embedding, tc_embedding)
-            norm_bug = np.linalg.norm(bug_embedding)
-            norm_tc = np.linalg.norm(tc_embedding)
+        Returns:
+            List of summary dictionaries with truncated description and steps
+        """
+        return [{
+            'id': tc['id'],
+            'title': tc['title'],
+            'description': _trim(tc['description'], 200),
+            'steps': _trim(tc['steps'], 300),
+            'similarity_score': score
+        } for tc, score in similar_tests]
+    
+    def _summarize_duplicate_pairs(self, potential_duplicates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Build the compact duplicate pair summary sent to Claude for duplicate review.
+        
+        Args:
+            potential_duplicates: Candidate pairs from _find_potential_duplicates()
             
-            if norm_bug > 0 and norm_tc > 0:
-                similarity = dot_product / (norm_bug * norm_tc)
-            else:
-                similarity = 0.0
+        Returns:
+            List of summary dictionaries with 1-indexed pair IDs
+        """
+        return [{
+            'pair_id': idx + 1,
+            'test_1_id': pair['test_case_1']['id'],
+            'test_1_title': pair['test_case_1']['title'],
+            'test_1_steps': _trim(pair['test_case_1']['steps'], 200),
+            'test_2_id': pair['test_case_2']['id'],
+            'test_2_title': pair['test_case_2']['title'],
+            'test_2_steps': _trim(pair['test_case_2']['steps'], 200),
+            'similarity_score': pair['similarity_score']
+        } for idx, pair in enumerate(potential_duplicates)]
+    
+    def _parse_analysis_response(self, response_text: str) -> Dict[str, Any]:
+        """
+        Parse Claude's bug analysis response, falling back to the raw text if it is not JSON.
+        
+        Args:
+            response_text: Raw response text from Claude
             
-            # Apply area-based boost/penalty
-            if apply_area_boost:
-                area_boost = self._calculate_area_similarity_boost(tc, bug_text)
-                similarity = min(1.0, similarity + area_boost)  # Cap at 1.0
+        Returns:
+            Dictionary containing analysis results
+        """
+        analysis = parse_claude_json(response_text)
+        if analysis is not None:
+            return analysis
+        
+        # If JSON parsing fails, return raw response
+        return {
+            "related_tests": [],
+            "suggested_updates": [],
+            "new_test_cases": [],
+            "duplicate_tests": [],
+            "raw_response": response_text
+        }
+    
+    def _enrich_duplicate_groups(
+        self,
+        duplicate_groups: List[Dict[str, Any]],
+        potential_duplicates: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Attach the actual test case IDs and similarity scores to Claude's duplicate groups.
+        
+        Args:
+            duplicate_groups: Claude's per-pair classifications (keyed by 1-indexed pair_id)
+            potential_duplicates: Candidate pairs the pair_ids refer to
             
-            # Only include if above minimum threshold
-            if similarity >= min_similarity:
-                similarities.append((tc, float(similarity)))
+        Returns:
+            Enriched duplicate groups, or Claude's groups unchanged if none could be matched
+        """
+        enriched_groups = []
+        for group in duplicate_groups:
+            pair_id = group.get('pair_id')
+            if pair_id and pair_id <= len(potential_duplicates):
+                # Get the actual pair data
+                pair = potential_duplicates[pair_id - 1]  # pair_id is 1-indexed
+                enriched_group = {
+                    'pair_id': pair_id,
+                    'classification': group.get('classification', 'UNKNOWN'),
+                    'reasoning': group.get('reasoning', ''),
+                    'recommendation': group.get('recommendation', ''),
+                    'test_case_1_id': pair['test_case_1']['id'],
+                    'test_case_2_id': pair['test_case_2']['id'],
+                    'similarity_score': pair['similarity_score']
+                }
+                enriched_groups.append(enriched_group)
+        
+        return enriched_groups if enriched_groups else duplicate_groups
+    
+    def _create_json_message(
+        self,
+        instructions: str,
+        prompt: str,
+        max_tokens: int = 4096,
+        cancel_event: Optional[threading.Event] = None
+    ) -> str:
+        """
+        Stream a Claude response, stopping as soon as the first top-level JSON object is complete.
+        
+        Any prose Claude would have generated after the JSON is never waited for.
         
-        # Sort by similarity and return top k
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:top_k]
+        Args:
+            instructions: Static instructions asking for a JSON response, sent as a cached prefix
+            prompt: Request-specific data the instructions apply to
+            max_tokens: Maximum tokens in response
+            cancel_event: When set, the stream is closed (stopping generation) and AnalysisCancelled is raised
+            
+        Returns:
+            Response text up to the end of the JSON object (or the full text if none closes)
+        """
+        _raise_if_cancelled(cancel_event)
+        scanner = _JsonObjectScanner()
+        chunks = []
+        stream = self.client.stream_message(
+            system=SYSTEM_BLOCKS,
+            messages=[{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+                    {"type": "text", "text": prompt}
+                ]
+            }],
+            max_tokens=max_tokens
+        )
+        try:
+            for chunk in stream:
+                _raise_if_cancelled(cancel_event)
+                end_idx = scanner.feed(chunk)
+                if end_idx != -1:
+                    chunks.append(chunk[:end_idx])
+                    break
+                chunks.append(chunk)
+        finally:
+            stream.close()
+        
+        return ''.join(chunks)
     
     def analyze_bug_with_claude(
         self,
         bug_description: str,
         repro_steps: str,
         code_changes: str,
-        similar_tests: List[Tuple[Dict[str, Any], float]]
+        similar_tests: List[Tuple[Dict[str, Any], float]],
+        cancel_event: Optional[threading.Event] = None
     ) -> Dict[str, Any]:
         """
         Use Claude to analyze the bug and provide detailed insights.
@@ -317,24 +1112,15 @@ class TestCaseAgent:
             repro_steps: Steps to reproduce the bug
             code_changes: Description of code changes made to fix the bug
             similar_tests: List of similar test cases with scores
+            cancel_event: Optional event that aborts the Claude request when set
             
         Returns:
             Dictionary containing analysis results
         """
         # Prepare test cases summary for Claude
-        test_cases_summary = []
-        for tc, score in similar_tests:
-            test_cases_summary.append({
-                'id': tc['id'],
-                'title': tc['title'],
-                'description': tc['description'][:200] + '...' if len(tc['description']) > 200 else tc['description'],
-                'steps': tc['steps'][:300] + '...' if len(tc['steps']) > 300 else tc['steps'],
-                'similarity_score': score
-            })
-        
-        prompt = f"""You are an expert QA analyst. Analyze this bug report and the related test cases.
-
-BUG REPORT:
+        test_cases_summary = self._summarize_test_cases(similar_tests)
+        
+        prompt = f"""BUG REPORT:
 Description: {bug_description}
 
 Reproduction Steps: {repro_steps}
@@ -342,58 +1128,163 @@ Reproduction Steps: {repro_steps}
 Code Changes Made: {code_changes}
 
 POTENTIALLY RELATED TEST CASES:
-{json.dumps(test_cases_summary, indent=2)}
-
-Please analyze and provide:
-
-1. RELATED_TESTS: Which test cases are most relevant to this bug? For each, explain WHY it's related and assign a confidence score (0-100).
+{_prompt_json(test_cases_summary)}"""
+        
+        response_text = self._create_json_message(ANALYZE_PROMPT, prompt, cancel_event=cancel_event)
+        
+        return self._parse_analysis_response(response_text)
+    
+    def analyze_bug_and_duplicates_with_claude(
+        self,
+        bug_description: str,
+        repro_steps: str,
+        code_changes: str,
+        similar_tests: List[Tuple[Dict[str, Any], float]],
+        potential_duplicates: List[Dict[str, Any]],
+        cancel_event: Optional[threading.Event] = None
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        Run bug analysis and duplicate review in a single Claude request.
+        
+        Equivalent to analyze_bug_with_claude() followed by the Claude step of
+        detect_duplicates_with_claude(), but saves a round-trip and sends the shared
+        bug context once.
+        
+        Args:
+            bug_description: Description of the bug
+            repro_steps: Steps to reproduce the bug
+            code_changes: Description of code changes made to fix the bug
+            similar_tests: List of similar test cases with scores
+            potential_duplicates: Candidate pairs from _find_potential_duplicates()
+            cancel_event: Optional event that aborts the Claude request when set
+            
+        Returns:
+            Tuple of (analysis results, duplicate groups)
+        """
+        prompt = self._combined_analysis_prompt(
+            bug_description, repro_steps, code_changes, similar_tests, potential_duplicates
+        )
+        
+        response_text = self._create_json_message(
+            COMBINED_ANALYSIS_PROMPT, prompt, max_tokens=COMBINED_ANALYSIS_MAX_TOKENS, cancel_event=cancel_event
+        )
+        
+        analysis = self._parse_analysis_response(response_text)
+        if 'raw_response' in analysis or 'duplicate_groups' not in analysis:
+            # Fallback: return basic similarity info for duplicates
+            return analysis, potential_duplicates
+        
+        duplicate_groups = analysis.pop('duplicate_groups')
+        return analysis, self._enrich_duplicate_groups(duplicate_groups, potential_duplicates)
+    
+    def _combined_analysis_prompt(
+        self,
+        bug_description: str,
+        repro_steps: str,
+        code_changes: str,
+        similar_tests: List[Tuple[Dict[str, Any], float]],
+        potential_duplicates: List[Dict[str, Any]]
+    ) -> str:
+        """
+        Build the prompt for analyze_bug_and_duplicates_with_claude().
+        
+        Args:
+            bug_description: Description of the bug
+            repro_steps: Steps to reproduce the bug
+            code_changes: Description of code changes made to fix the bug
+            similar_tests: List of similar test cases with scores
+            potential_duplicates: Candidate pairs from _find_potential_duplicates()
+            
+        Returns:
+            Bug report, test case and duplicate pair data for COMBINED_ANALYSIS_PROMPT
+        """
+        return f"""BUG REPORT:
+Description: {bug_description}
 
-2. SUGGESTED_UPDATES: What changes should be made to existing test cases due to this bug fix? Be specific about which test cases need updates and what should change in their steps or expected results.
+Reproduction Steps: {repro_steps}
 
-3. NEW_TEST_CASES: Are there any gaps in test coverage? Suggest new test cases that should be created to catch this type of bug in the future.
+Code Changes Made: {code_changes}
 
-4. DUPLICATE_DETECTION: Do any of these test cases appear to test the same functionality? Identify potential duplicates or overlapping test scenarios.
+POTENTIALLY RELATED TEST CASES:
+{_prompt_json(self._summarize_test_cases(similar_tests))}
 
-Provide your response in JSON format with these exact keys: related_tests, suggested_updates, new_test_cases, duplicate_tests."""
+POTENTIAL DUPLICATE PAIRS:
+{_prompt_json(self._summarize_duplicate_pairs(potential_duplicates))}"""
+    
+    def _find_potential_duplicates(
+        self,
+        test_cases: List[Dict[str, Any]],
+        similarity_threshold: float = DUPLICATE_SIMILARITY_THRESHOLD
+    ) -> List[Dict[str, Any]]:
+        """
+        Find pairs of test cases whose embeddings are at least similarity_threshold apart.
         
-        response_text = self.client.create_message(
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=4096
-        )
+        Args:
+            test_cases: List of test cases to compare
+            similarity_threshold: Minimum similarity score to consider as potential duplicate
+            
+        Returns:
+            Up to 20 candidate pairs, most similar first
+        """
+        if len(test_cases) < 2:
+            return []
         
-        # Try to parse JSON response
-        try:
-            # Find JSON in the response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-                analysis = json.loads(json_str)
-            else:
-                # Fallback: create structured response from text
-                analysis = {
-                    "related_tests": [],
-                    "suggested_updates": [],
-                    "new_test_cases": [],
-                    "duplicate_tests": [],
-                    "raw_response": response_text
-                }
-        except json.JSONDecodeError:
-            # If JSON parsing fails, return raw response
-            analysis = {
-                "related_tests": [],
-                "suggested_updates": [],
-                "new_test_cases": [],
-                "duplicate_tests": [],
-                "raw_response": response_text
+        rows = [self._index_row(tc) for tc in test_cases]
+        if None not in rows:
+            # All from the loaded index (e.g. the similar tests): gather their normalized rows
+            embeddings = self._emb_matrix[rows]
+        else:
+            # Stack embeddings for all test cases, encoding any uncached ones in one batch
+            embeddings = self.embed_batch([self._get_combined_text(tc) for tc in test_cases])
+        
+        faiss = _load_faiss() if len(test_cases) >= FAISS_MIN_TEST_CASES else None
+        if faiss is not None:
+            # Range search returns only the neighbours above the threshold, without
+            # materialising the N x N matrix. FAISS keeps scores strictly greater than
+            # the radius, so step just below the threshold to keep ">=" semantics.
+            index = faiss.IndexFlatIP(embeddings.shape[1])
+            index.add(embeddings)
+            radius = float(np.nextafter(np.float32(similarity_threshold), np.float32(-np.inf)))
+            lims, scores, neighbours = index.range_search(embeddings, radius)
+            # lims is uint64, which np.repeat won't cast to a platform int implicitly
+            rows = np.repeat(np.arange(len(test_cases)), np.diff(lims).astype(np.intp))
+            upper = rows < neighbours
+            rows, cols, scores = rows[upper], neighbours[upper], scores[upper]
+        else:
+            # Score pairs a block of rows at a time against the rows at or after the block
+            # (upper triangle only, i < j), reusing one buffer instead of holding an N x N matrix
+            n = len(test_cases)
+            buffer = np.empty(min(DUPLICATE_BLOCK_SIZE, n) * n, dtype=embeddings.dtype)
+            row_parts, col_parts, score_parts = [], [], []
+            for start in range(0, n, DUPLICATE_BLOCK_SIZE):
+                stop = min(start + DUPLICATE_BLOCK_SIZE, n)
+                block = buffer[:(stop - start) * (n - start)].reshape(stop - start, n - start)
+                np.matmul(embeddings[start:stop], embeddings[start:].T, out=block)
+                block_rows, block_cols = np.nonzero(np.triu(block >= similarity_threshold, k=1))
+                row_parts.append(block_rows + start)
+                col_parts.append(block_cols + start)
+                score_parts.append(block[block_rows, block_cols])
+            rows = np.concatenate(row_parts)
+            cols = np.concatenate(col_parts)
+            scores = np.concatenate(score_parts)
+        
+        potential_duplicates = [
+            {
+                'test_case_1': test_cases[i],
+                'test_case_2': test_cases[j],
+                'similarity_score': float(score)
             }
+            for i, j, score in zip(rows, cols, scores)
+        ]
         
-        return analysis
+        # Limit to top 20 most similar pairs to avoid token limits
+        potential_duplicates.sort(key=lambda x: x['similarity_score'], reverse=True)
+        return potential_duplicates[:20]
     
     def detect_duplicates_with_claude(
         self,
         test_cases: List[Dict[str, Any]] = None,
-        similarity_threshold: float = 0.90
+        similarity_threshold: float = DUPLICATE_SIMILARITY_THRESHOLD
     ) -> List[Dict[str, Any]]:
         """
         Detect duplicate or highly similar test cases using embeddings and Claude.
@@ -408,106 +1299,19 @@ Provide your response in JSON format with these exact keys: related_tests, sugge
         if test_cases is None:
             test_cases = self.test_cases
         
-        if len(test_cases) < 2:
-            return []
-        
-        # Compute embeddings for all test cases
-        tc_embeddings = {}
-        for tc in test_cases:
-            combined_text = f"{tc['title']} {tc['description']} {tc['steps']}"
-            tc_embeddings[tc['id']] = self.get_embedding(combined_text)
-        
-        # Find potential duplicates based on similarity
-        potential_duplicates = []
-        test_ids = list(tc_embeddings.keys())
-        
-        for i in range(len(test_ids)):
-            for j in range(i + 1, len(test_ids)):
-                id1, id2 = test_ids[i], test_ids[j]
-                
-                # Cosine similarity
-                emb1, emb2 = tc_embeddings[id1], tc_embeddings[id2]
-                dot_product = np.dot(emb1, emb2)
-                norm1 = np.linalg.norm(emb1)
-                norm2 = np.linalg.norm(emb2)
-                
-                if norm1 > 0 and norm2 > 0:
-                    similarity = dot_product / (norm1 * norm2)
-                else:
-                    similarity = 0.0
-                
-                if similarity >= similarity_threshold:
-                    tc1 = next(tc for tc in test_cases if tc['id'] == id1)
-                    tc2 = next(tc for tc in test_cases if tc['id'] == id2)
-                    potential_duplicates.append({
-                        'test_case_1': tc1,
-                        'test_case_2': tc2,
-                        'similarity_score': float(similarity)
-                    })
+        potential_duplicates = self._find_potential_duplicates(test_cases, similarity_threshold)
         
         # If we found potential duplicates, ask Claude to analyze them
         if potential_duplicates:
-            # Limit to top 20 most similar pairs to avoid token limits
-            potential_duplicates.sort(key=lambda x: x['similarity_score'], reverse=True)
-            potential_duplicates = potential_duplicates[:20]
+            prompt = f"""POTENTIAL DUPLICATE PAIRS:
+{_prompt_json(self._summarize_duplicate_pairs(potential_duplicates))}"""
             
-            prompt = f"""You are a QA expert. Analyze these pairs of test cases that appear similar based on semantic analysis.
-
-For each pair, determine:
-1. Are they TRUE DUPLICATES (testing exact same functionality)?
-2. Are they OVERLAPPING (testing similar but slightly different scenarios)?
-3. Are they DISTINCT (different despite high similarity score)?
-
-Provide recommendations for consolidation or keeping them separate.
-
-POTENTIAL DUPLICATE PAIRS:
-{json.dumps([{
-    'pair_id': idx + 1,
-    'test_1_id': pair['test_case_1']['id'],
-    'test_1_title': pair['test_case_1']['title'],
-    'test_1_steps': pair['test_case_1']['steps'][:200] + '...' if len(pair['test_case_1']['steps']) > 200 else pair['test_case_1']['steps'],
-    'test_2_id': pair['test_case_2']['id'],
-    'test_2_title': pair['test_case_2']['title'],
-    'test_2_steps': pair['test_case_2']['steps'][:200] + '...' if len(pair['test_case_2']['steps']) > 200 else pair['test_case_2']['steps'],
-    'similarity_score': pair['similarity_score']
-} for idx, pair in enumerate(potential_duplicates)], indent=2)}
-
-Respond in JSON format with: duplicate_groups (array of objects with pair_id, classification, reasoning, recommendation)."""
+            response_text = self._create_json_message(DUPLICATES_PROMPT, prompt)
             
-            response_text = self.client.create_message(
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=4096
-            )
-            
-            try:
-                start_idx = response_text.find('{')
-                end_idx = response_text.rfind('}') + 1
-                if start_idx != -1 and end_idx > start_idx:
-                    json_str = response_text[start_idx:end_idx]
-                    claude_analysis = json.loads(json_str)
-                    duplicate_groups = claude_analysis.get('duplicate_groups', [])
-                    
-                    # Enrich the duplicate groups with actual test case IDs
-                    enriched_groups = []
-                    for group in duplicate_groups:
-                        pair_id = group.get('pair_id')
-                        if pair_id and pair_id <= len(potential_duplicates):
-                            # Get the actual pair data
-                            pair = potential_duplicates[pair_id - 1]  # pair_id is 1-indexed
-                            enriched_group = {
-                                'pair_id': pair_id,
-                                'classification': group.get('classification', 'UNKNOWN'),
-                                'reasoning': group.get('reasoning', ''),
-                                'recommendation': group.get('recommendation', ''),
-                                'test_case_1_id': pair['test_case_1']['id'],
-                                'test_case_2_id': pair['test_case_2']['id'],
-                                'similarity_score': pair['similarity_score']
-                            }
-                            enriched_groups.append(enriched_group)
-                    
-                    return enriched_groups if enriched_groups else duplicate_groups
-            except json.JSONDecodeError:
-                pass
+            claude_analysis = parse_claude_json(response_text)
+            if claude_analysis is not None:
+                duplicate_groups = claude_analysis.get('duplicate_groups', [])
+                return self._enrich_duplicate_groups(duplicate_groups, potential_duplicates)
             
             # Fallback: return basic similarity info
             return potential_duplicates
@@ -533,49 +1337,31 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
         """
         csv_rows = []
         
-        # Build a lookup for duplicate relationships
-        duplicate_map = {}  # test_case_id -> {'related': list, 'classifications': list}
+        # Build a lookup for duplicate relationships: test_case_id -> {related_id: classification},
+        # in the order relationships were found (dict keys give O(1) dedupe checks)
+        duplicate_map = defaultdict(dict)
         duplicate_analysis = results.get('duplicate_analysis', [])
         
         for dup in duplicate_analysis:
-            if isinstance(dup, dict):
-                # Check if this has enriched data with test case IDs
-                if 'test_case_1_id' in dup and 'test_case_2_id' in dup:
-                    tc1_id = str(dup['test_case_1_id'])
-                    tc2_id = str(dup['test_case_2_id'])
-                    classification = dup.get('classification', 'UNKNOWN')
-                    
-                    # Initialize entries if they don't exist
-                    if tc1_id not in duplicate_map:
-                        duplicate_map[tc1_id] = {'related': [], 'classifications': []}
-                    if tc2_id not in duplicate_map:
-                        duplicate_map[tc2_id] = {'related': [], 'classifications': []}
-                    
-                    # Add relationship if not already present
-                    if tc2_id not in duplicate_map[tc1_id]['related']:
-                        duplicate_map[tc1_id]['related'].append(tc2_id)
-                        duplicate_map[tc1_id]['classifications'].append(classification)
-                    if tc1_id not in duplicate_map[tc2_id]['related']:
-                        duplicate_map[tc2_id]['related'].append(tc1_id)
-                        duplicate_map[tc2_id]['classifications'].append(classification)
-                        
-                elif 'test_case_1' in dup and 'test_case_2' in dup:
-                    # This is raw similarity data (fallback response from detect_duplicates)
-                    tc1_id = str(dup['test_case_1']['id'])
-                    tc2_id = str(dup['test_case_2']['id'])
-                    classification = 'HIGH SIMILARITY'
-                    
-                    if tc1_id not in duplicate_map:
-                        duplicate_map[tc1_id] = {'related': [], 'classifications': []}
-                    if tc2_id not in duplicate_map:
-                        duplicate_map[tc2_id] = {'related': [], 'classifications': []}
-                    
-                    if tc2_id not in duplicate_map[tc1_id]['related']:
-                        duplicate_map[tc1_id]['related'].append(tc2_id)
-                        duplicate_map[tc1_id]['classifications'].append(classification)
-                    if tc1_id not in duplicate_map[tc2_id]['related']:
-                        duplicate_map[tc2_id]['related'].append(tc1_id)
-                        duplicate_map[tc2_id]['classifications'].append(classification)
+            if not isinstance(dup, dict):
+                continue
+            
+            # Check if this has enriched data with test case IDs
+            if 'test_case_1_id' in dup and 'test_case_2_id' in dup:
+                tc1_id = str(dup['test_case_1_id'])
+                tc2_id = str(dup['test_case_2_id'])
+                classification = dup.get('classification', 'UNKNOWN')
+            elif 'test_case_1' in dup and 'test_case_2' in dup:
+                # This is raw similarity data (fallback response from detect_duplicates)
+                tc1_id = str(dup['test_case_1']['id'])
+                tc2_id = str(dup['test_case_2']['id'])
+                classification = 'HIGH SIMILARITY'
+            else:
+                continue
+            
+            # Add relationship if not already present
+            duplicate_map[tc1_id].setdefault(tc2_id, classification)
+            duplicate_map[tc2_id].setdefault(tc1_id, classification)
         
         # Build lookup for Claude's analysis
         claude_analysis = results.get('claude_analysis', {})
@@ -613,7 +1399,7 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
             related_ids = ''
             duplicate_classification = 'DISTINCT'  # Default to DISTINCT if not analyzed
             if tc_id in duplicate_map:
-                classifications = duplicate_map[tc_id]['classifications']
+                classifications = duplicate_map[tc_id].values()
                 # Combine unique classifications
                 unique_classifications = list(set(classifications))
                 duplicate_classification = ', '.join(unique_classifications) if unique_classifications else 'DISTINCT'
@@ -622,7 +1408,7 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
                 show_related = any('OVERLAPPING' in c.upper() or 'TRUE DUPLICATE' in c.upper() 
                                   for c in classifications)
                 if show_related:
-                    related_ids = ', '.join(duplicate_map[tc_id]['related'])
+                    related_ids = ', '.join(duplicate_map[tc_id])
             
             # Get Claude analysis
             claude_reason = ''
@@ -648,37 +1434,31 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
             
             combined_reasoning = '; '.join(reasoning_parts)
             
-            # Create CSV row
-            csv_rows.append({
-                'Test Case ID': tc_id,
-                'Title': test_case.get('title', ''),
-                'State': test_case.get('state', ''),
-                'Area': test_case.get('area', ''),
-                'Created Date': test_case.get('created_date', ''),
-                'Similarity Score': f"{similarity_score:.4f}",
-                'Reasoning': combined_reasoning,
-                'Duplicate Classification': duplicate_classification,
-                'Related Test IDs': related_ids,
-                'Suggested Update': suggested_update
-            })
+            # Create CSV row (in CSV_EXPORT_COLUMNS order)
+            csv_rows.append((
+                tc_id,
+                test_case.get('title', ''),
+                test_case.get('state', ''),
+                test_case.get('area', ''),
+                test_case.get('created_date', ''),
+                f"{similarity_score:.4f}",
+                combined_reasoning,
+                duplicate_classification,
+                related_ids,
+                suggested_update
+            ))
         
         # Write to CSV
         if csv_rows:
-            fieldnames = [
-                'Test Case ID', 'Title', 'State', 'Area', 'Created Date',
-                'Similarity Score', 'Reasoning', 'Duplicate Classification', 
-                'Related Test IDs', 'Suggested Update'
-            ]
-            
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
+            with open(output_path, 'w', newline='', encoding='utf-8', buffering=CSV_WRITE_BUFFER_SIZE) as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_EXPORT_COLUMNS)
                 writer.writerows(csv_rows)
             
-            print(f"\n[OK] Exported {len(csv_rows)} test cases to: {output_path}")
+            logger.info("Exported %d test cases to: %s", len(csv_rows), output_path)
             return output_path
         else:
-            print(f"\n[WARN] No test cases above similarity threshold ({similarity_threshold})")
+            logger.warning("No test cases above similarity threshold (%s)", similarity_threshold)
             return None
     
     def analyze_bug_report(
@@ -692,7 +1472,10 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
         csv_output_path: Optional[str] = None,
         similarity_threshold: Optional[float] = None,
         strictness: Literal['lenient', 'moderate', 'strict'] = 'moderate',
-        apply_area_boost: bool = True
+        apply_area_boost: bool = True,
+        use_cache: bool = True,
+        duplicate_threshold: float = DUPLICATE_SIMILARITY_THRESHOLD,
+        cancel_event: Optional[threading.Event] = None
     ) -> Dict[str, Any]:
         """
         Complete analysis pipeline for a bug report.
@@ -708,17 +1491,30 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
             similarity_threshold: Minimum similarity score for CSV export (default: None, uses strictness setting)
             strictness: Filtering strictness level - 'lenient', 'moderate', or 'strict' (default: 'moderate')
             apply_area_boost: Whether to apply area-based similarity boosting (default: True)
+            use_cache: Reuse a cached result for identical inputs, or for a bug report with nearly
+                the same meaning and otherwise identical inputs (default: True)
+            duplicate_threshold: Minimum embedding similarity for a pair of similar tests to be
+                reviewed by Claude as a potential duplicate (default: 0.90). Raising it sends fewer
+                pairs, and skips the duplicate review entirely when no pair qualifies.
+            cancel_event: Optional event another thread can set to abandon the analysis (e.g. when
+                the API client disconnects). It is checked between steps and while Claude streams.
             
         Returns:
             Complete analysis including related tests, updates, and duplicates.
+            'cached' is True when the result was reused from a cache.
             If output_format='csv', also includes 'csv_path' key with path to exported file.
+            
+        Raises:
+            AnalysisCancelled: If cancel_event was set before the analysis finished
         """
         # Auto-load test cases if MCP is enabled and no test cases are loaded
         if auto_load and self.use_mcp and len(self.test_cases) == 0:
-            print("\nAuto-detecting relevant test cases...")
+            logger.info("Auto-detecting relevant test cases...")
             load_result = self.detect_and_load_test_cases(bug_description, repro_steps)
-            print(f"[OK] Loaded {load_result['test_cases_count']} test cases from {len(load_result['areas_loaded'])} area(s)")
-            print(f"  Recommendation: {load_result['recommendation']}\n")
+            logger.info(
+                "Loaded %d test cases from %d area(s). Recommendation: %s",
+                load_result['test_cases_count'], len(load_result['areas_loaded']), load_result['recommendation']
+            )
         
         if len(self.test_cases) == 0:
             return {
@@ -742,11 +1538,87 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
         if similarity_threshold is None:
             similarity_threshold = thresholds['min_similarity']
         
-        print(f"\nUsing '{strictness}' strictness level:")
-        print(f"  - Minimum similarity: {min_similarity:.2f}")
-        print(f"  - Claude analysis threshold: {claude_threshold:.2f}")
-        print(f"  - CSV export threshold: {similarity_threshold:.2f}")
-        print(f"  - Area boosting: {'enabled' if apply_area_boost else 'disabled'}\n")
+        logger.info(
+            "Using '%s' strictness level: minimum similarity %.2f, Claude analysis threshold %.2f, "
+            "CSV export threshold %.2f, area boosting %s",
+            strictness, min_similarity, claude_threshold, similarity_threshold,
+            'enabled' if apply_area_boost else 'disabled'
+        )
+        
+        results = None
+        if use_cache:
+            cache_key = self._result_cache_key(
+                bug_description, repro_steps, code_changes, top_k, strictness, apply_area_boost,
+                duplicate_threshold
+            )
+            results = self._load_cached_result(cache_key)
+            if results is not None:
+                logger.info("Reusing cached analysis for identical inputs")
+            else:
+                params_key = self._result_cache_key(
+                    code_changes, top_k, strictness, apply_area_boost, duplicate_threshold
+                )
+                bug_embedding = self.get_embedding(f"{bug_description} {repro_steps}")
+                results = self._find_semantic_cache_hit(bug_embedding, params_key)
+        
+        cached = results is not None
+        if not cached:
+            results = self._run_analysis(
+                bug_description, repro_steps, code_changes, top_k, thresholds, strictness, apply_area_boost,
+                duplicate_threshold, cancel_event
+            )
+            # Don't cache unparsed Claude responses so the next run retries them
+            if use_cache and 'raw_response' not in results['claude_analysis']:
+                self._store_cached_result(cache_key, results)
+                self._bug_cache.append((bug_embedding, params_key, results))
+        
+        # Copy so the keys added below never leak into cached results
+        results = dict(results, cached=cached)
+        
+        # Export to CSV if requested
+        if output_format == 'csv':
+            if csv_output_path is None:
+                # Auto-generate filename with timestamp
+                from datetime import datetime
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                csv_output_path = f"bug_analysis_results_{timestamp}.csv"
+            
+            csv_path = self.export_results_to_csv(results, csv_output_path, similarity_threshold)
+            results['csv_path'] = csv_path
+        
+        return results
+    
+    def _run_analysis(
+        self,
+        bug_description: str,
+        repro_steps: str,
+        code_changes: str,
+        top_k: int,
+        thresholds: Dict[str, float],
+        strictness: str,
+        apply_area_boost: bool,
+        duplicate_threshold: float,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the similarity search and Claude analysis steps of analyze_bug_report().
+        
+        Args:
+            bug_description: Description of the bug
+            repro_steps: Steps to reproduce
+            code_changes: Code changes made to fix the bug
+            top_k: Number of similar test cases to analyze
+            thresholds: Thresholds from _get_strictness_thresholds()
+            strictness: Strictness level the thresholds came from
+            apply_area_boost: Whether to apply area-based similarity boosting
+            duplicate_threshold: Minimum similarity for a potential duplicate pair
+            cancel_event: Optional event that aborts the analysis when set
+            
+        Returns:
+            Analysis results (without any CSV export)
+        """
+        min_similarity = thresholds['min_similarity']
+        claude_threshold = thresholds['claude_analysis']
         
         # Step 1: Find similar test cases using semantic search with strict filtering
         similar_tests = self.find_similar_test_cases(
@@ -761,21 +1633,32 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
         high_confidence_tests = [(tc, score) for tc, score in similar_tests if score >= claude_threshold]
         
         if not high_confidence_tests:
-            print(f"[WARN] No test cases above Claude analysis threshold ({claude_threshold:.2f})")
+            logger.warning("No test cases above Claude analysis threshold (%.2f)", claude_threshold)
             if similar_tests:
-                print(f"  Found {len(similar_tests)} test cases above minimum threshold ({min_similarity:.2f})")
-                print(f"  Highest similarity: {similar_tests[0][1]:.3f}")
+                logger.warning(
+                    "Found %d test cases above minimum threshold (%.2f), highest similarity %.3f",
+                    len(similar_tests), min_similarity, similar_tests[0][1]
+                )
                 # Use the similar tests anyway but warn user
                 high_confidence_tests = similar_tests[:min(5, len(similar_tests))]  # Use top 5 at most
         
-        # Step 3: Analyze with Claude using filtered test cases
-        claude_analysis = self.analyze_bug_with_claude(
-            bug_description, repro_steps, code_changes, high_confidence_tests
-        )
-        
-        # Step 4: Detect duplicates among the similar tests
+        # Step 3: Find potential duplicates among the similar tests using embeddings
         similar_test_cases = [tc for tc, _ in similar_tests]
-        duplicates = self.detect_duplicates_with_claude(similar_test_cases)
+        potential_duplicates = self._find_potential_duplicates(similar_test_cases, duplicate_threshold)
+        
+        # Step 4: Analyze with Claude using filtered test cases, reviewing any
+        # potential duplicates in the same request
+        if potential_duplicates:
+            claude_analysis, duplicates = self.analyze_bug_and_duplicates_with_claude(
+                bug_description, repro_steps, code_changes, high_confidence_tests, potential_duplicates,
+                cancel_event=cancel_event
+            )
+        else:
+            claude_analysis = self.analyze_bug_with_claude(
+                bug_description, repro_steps, code_changes, high_confidence_tests,
+                cancel_event=cancel_event
+            )
+            duplicates = []
         
         # Combine results
         results = {
@@ -798,22 +1681,13 @@ Respond in JSON format with: duplicate_groups (array of objects with pair_id, cl
             }
         }
         
-        # Export to CSV if requested
-        if output_format == 'csv':
-            if csv_output_path is None:
-                # Auto-generate filename with timestamp
-                from datetime import datetime
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                csv_output_path = f"bug_analysis_results_{timestamp}.csv"
-            
-            csv_path = self.export_results_to_csv(results, csv_output_path, similarity_threshold)
-            results['csv_path'] = csv_path
-        
         return results
 
 
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Initialize agent with MCP enabled
     agent = TestCaseAgent(use_mcp=True)
     
@@ -6,10 +6,12 @@ CSV files, and area path patterns for intelligent test case retrieval.
 """
 
 import os
+import re
 from pathlib import Path
+from typing import Dict, List, Set, Tuple
 
 # Base path to CSV files (relative to backend directory)
-CSV_BASE_PATH = Path(__file__).parent.parent.parent.parent.parent
+CSV_BASE_PATH = Path(__file__).resolve().parents[4]
 
 # Mapping of app families to their CSV filenames
 CSV_FILE_MAPPING = {
@@ -26,6 +28,9 @@ CSV_FILE_PATHS = {
     for area, filename in CSV_FILE_MAPPING.items()
 }
 
+# Areas whose CSV file exists, checked once at import so lookups don't stat the file
+_EXISTING_CSV_AREAS = frozenset(area for area, path in CSV_FILE_PATHS.items() if os.path.exists(path))
+
 # Keywords associated with each app family for detection
 AREA_KEYWORDS = {
     "Expert Disbursements": [
@@ -125,16 +130,107 @@ AREA_PRIORITY = [
 ]
 
 
+# Lowercased keyword -> areas listing it (a keyword such as "wip" can belong to several areas)
+KEYWORD_AREAS: Dict[str, Tuple[str, ...]] = {}
+for _area_name, _keywords in AREA_KEYWORDS.items():
+    for _keyword in _keywords:
+        KEYWORD_AREAS[_keyword.lower()] = KEYWORD_AREAS.get(_keyword.lower(), ()) + (_area_name,)
+
+# Evidence each keyword match contributes: shared keywords (e.g. "wip" in Billing and Expert
+# Disbursements) count as a fraction, so ambiguous text doesn't score high for every area
+KW_WEIGHT: Dict[str, float] = {keyword: 1.0 / len(areas) for keyword, areas in KEYWORD_AREAS.items()}
+
+
+def _build_keyword_automaton():
+    """
+    Build an Aho-Corasick automaton over all area keywords.
+    
+    Each lowercased keyword maps to itself, so one pass over the text finds every
+    keyword of every area.
+    
+    Returns:
+        The automaton, or None if pyahocorasick is not installed
+    """
+    try:
+        import ahocorasick
+    except ImportError:
+        return None
+    
+    automaton = ahocorasick.Automaton()
+    for keyword in KEYWORD_AREAS:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+_KEYWORD_AUTOMATON = _build_keyword_automaton()
+
+# Fallback when pyahocorasick isn't installed: one regex over all keywords. The lookahead
+# tries every position and reports the longest keyword starting there, so overlapping
+# keywords aren't consumed by an earlier match.
+_KEYWORD_REGEX = re.compile(
+    "(?=(" + "|".join(map(re.escape, sorted(KEYWORD_AREAS, key=len, reverse=True))) + "))"
+)
+
+# Keywords contained in each keyword (itself included). A keyword starting at the same
+# position as a longer match is only reported as that match, so it's credited from here.
+_CONTAINED_KEYWORDS = {
+    keyword: tuple(other for other in KEYWORD_AREAS if other in keyword)
+    for keyword in KEYWORD_AREAS
+}
+
+
+def _find_keywords(text: str) -> Set[str]:
+    """Return the distinct lowercased keywords occurring in an already lowercased text."""
+    if _KEYWORD_AUTOMATON is not None:
+        return {keyword for _, keyword in _KEYWORD_AUTOMATON.iter(text)}
+    
+    found = set()
+    for longest in set(_KEYWORD_REGEX.findall(text)):
+        found.update(_CONTAINED_KEYWORDS[longest])
+    return found
+
+
+def match_area_keywords(text: str) -> Dict[str, List[str]]:
+    """
+    Find the distinct keywords of each area that appear in a text (case-insensitive substring match).
+    
+    Args:
+        text: Text to scan, e.g. the bug description and repro steps
+    
+    Returns:
+        Dictionary mapping area names to their matched lowercased keywords (areas without matches are omitted)
+    """
+    matches = {}
+    for keyword in _find_keywords(text.lower()):
+        for area_name in KEYWORD_AREAS[keyword]:
+            matches.setdefault(area_name, []).append(keyword)
+    return matches
+
+
+def score_areas(text: str) -> Dict[str, int]:
+    """
+    Count how many distinct keywords of each area appear in a text (case-insensitive substring match).
+    
+    Args:
+        text: Text to scan, e.g. the bug description and repro steps
+    
+    Returns:
+        Dictionary mapping area names to matched keyword counts (areas without matches are omitted)
+    """
+    return {area_name: len(keywords) for area_name, keywords in match_area_keywords(text).items()}
+
+
 def get_csv_path(area_name: str) -> str:
     """
     Get the absolute path to a CSV file for a given area.
     
     Args:
         area_name: Name of the app family/area
-        
+    
     Returns:
         Absolute path to the CSV file
-        
+    
     Raises:
         KeyError: If area name is not found
     """
@@ -142,7 +238,7 @@ def get_csv_path(area_name: str) -> str:
         raise KeyError(f"Unknown area: {area_name}. Available areas: {list(CSV_FILE_PATHS.keys())}")
     
     path = CSV_FILE_PATHS[area_name]
-    if not os.path.exists(path):
+    if area_name not in _EXISTING_CSV_AREAS:
         raise FileNotFoundError(f"CSV file not found: {path}")
     
     return path
@@ -164,7 +260,7 @@ def get_area_keywords(area_name: str) -> list:
     
     Args:
         area_name: Name of the app family/area
-        
+    
     Returns:
         List of keywords
     """
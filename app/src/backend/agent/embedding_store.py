@@ -0,0 +1,104 @@
+"""
+Persistent Embedding Store
+
+SQLite-backed cache of text embeddings, so test cases don't have to be re-embedded
+every time the agent starts.
+"""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+
+class EmbeddingStore:
+    """
+    Embedding vectors stored on disk, keyed by a text digest.
+    
+    Entries are grouped by a namespace (model name and version) so switching models
+    never returns vectors from a different embedding space. Vectors are stored as
+    float16 to halve the file size and returned as float32 for computation.
+    """
+    
+    # SQLite limits the number of bound parameters per statement
+    _QUERY_CHUNK = 500
+    
+    STORAGE_DTYPE = np.float16
+    
+    def __init__(self, path: Path, namespace: str):
+        """
+        Open (or create) the store.
+        
+        Args:
+            path: Path of the SQLite database file
+            namespace: Identifies the model that produced the vectors
+        """
+        self.path = Path(path)
+        # The storage dtype is part of the namespace so vectors written with another dtype are never misread
+        self.namespace = f"{namespace}:{np.dtype(self.STORAGE_DTYPE).name}"
+        self.hits = 0
+        self.misses = 0
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "namespace TEXT NOT NULL, key BLOB NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+    
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Look up stored vectors.
+        
+        Args:
+            keys: Text digests to look up
+        
+        Returns:
+            Dictionary of the keys that were found mapped to float32 vectors
+        """
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self._QUERY_CHUNK):
+                chunk = keys[start:start + self._QUERY_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE namespace = ? AND key IN ({placeholders})",
+                    (self.namespace, *chunk)
+                )
+                for key, vector in rows:
+                    found[bytes(key)] = np.frombuffer(vector, dtype=self.STORAGE_DTYPE).astype(np.float32)
+        
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+    
+    def put_many(self, items: Iterable[Tuple[bytes, np.ndarray]]) -> None:
+        """
+        Store vectors, replacing any existing entries for the same keys.
+        
+        Args:
+            items: (key, vector) pairs
+        """
+        rows = [
+            (self.namespace, key, np.ascontiguousarray(vector, dtype=self.STORAGE_DTYPE).tobytes())
+            for key, vector in items
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (namespace, key, vector) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, float]:
+        """Return lookup counts and hit rate since the store was opened."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -3,31 +3,44 @@ FastAPI backend for Test Case Analysis Agent
 Provides REST API endpoints for bug analysis, CSV export, TFS/GitHub integration, and PR summarization
 """
 
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import os
 import sys
 from pathlib import Path
 from datetime import datetime
-import traceback
 import tempfile
-import requests
+import shutil
+import httpx
 import base64
 import re
-import json
+import html
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+import logging
 from dotenv import load_dotenv
 from bedrock_client import get_claude_client, check_bedrock_configured, invoke_claude, get_bedrock_client
 
 # Load environment variables
 load_dotenv()
 
+# Request and agent progress is logged at INFO (set LOG_LEVEL=WARNING to quiet it, DEBUG for request inputs)
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger(__name__)
+
 # Add agent to path
 sys.path.append(str(Path(__file__).parent))
 
-from agent.agent import TestCaseAgent
+from agent.agent import TestCaseAgent, AnalysisCancelled, parse_claude_json
 from bedrock_client import invoke_claude, BEDROCK_MODEL_ID
 
 # TFS Configuration (loaded from .env file)
@@ -45,7 +58,9 @@ GITHUB_REPO = os.getenv("GITHUB_REPO", "")  # Repository name
 app = FastAPI(
     title="Test Case Analysis API",
     description="AI-powered test case analysis and bug report matching with TFS/GitHub integration",
-    version="2.0.0"
+    version="2.0.0",
+    # Serialize responses with orjson (C) instead of the stdlib json module
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS for frontend integration
@@ -60,18 +75,145 @@ app.add_middleware(
 # Global agent instance
 agent: Optional[TestCaseAgent] = None
 
+# Shared async HTTP client for TFS and GitHub calls (connection pooling, HTTP/2 where supported)
+http_client: Optional[httpx.AsyncClient] = None
+
+# The agent keeps the loaded test cases and scoring buffers on the instance, so calls into it
+# are serialized even when they run on worker threads
+agent_lock = threading.Lock()
+
+# How often a long-running request checks whether its client has gone away
+DISCONNECT_POLL_SECONDS = 0.5
+
 
 def get_agent() -> TestCaseAgent:
     """Get or initialize the test case agent."""
     global agent
     if agent is None:
-        print("Initializing Test Case Agent with MCP enabled...")
+        logger.info("Initializing Test Case Agent with MCP enabled...")
         agent = TestCaseAgent(use_mcp=True)
     return agent
 
 
-def get_tfs_headers():
-    """Get authorization headers for TFS API calls."""
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared async HTTP client."""
+    global http_client
+    if http_client is None:
+        http_client = httpx.AsyncClient(http2=True, timeout=30)
+    return http_client
+
+
+# Uploads are copied to disk in chunks of this size rather than read into memory whole
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+def save_upload_to_temp_file(upload_file, suffix: str = '.csv') -> str:
+    """
+    Copy an uploaded file's contents to a new named temporary file.
+    
+    Blocking; call it through run_in_threadpool from async endpoints.
+    
+    Args:
+        upload_file: File object of the upload (UploadFile.file)
+        suffix: Suffix for the temporary file name
+        
+    Returns:
+        Path of the temporary file (the caller deletes it)
+    """
+    with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix=suffix) as tmp_file:
+        shutil.copyfileobj(upload_file, tmp_file, UPLOAD_CHUNK_SIZE)
+        return tmp_file.name
+
+
+async def run_agent_call(func, *args, **kwargs):
+    """
+    Run a blocking agent method on the thread pool so the event loop stays responsive.
+    
+    Args:
+        func: Bound agent method to call
+        *args, **kwargs: Arguments passed to the method
+        
+    Returns:
+        The method's return value
+    """
+    def locked_call():
+        with agent_lock:
+            return func(*args, **kwargs)
+    
+    return await run_in_threadpool(locked_call)
+
+
+async def run_cancellable_agent_call(http_request: Request, func, *args, **kwargs):
+    """
+    Run a blocking agent method that accepts cancel_event, abandoning it if the client disconnects.
+    
+    The method runs on the thread pool while the connection is polled. On disconnect the
+    cancel event is set, which stops any in-flight Claude stream at the next chunk.
+    
+    Args:
+        http_request: Incoming request, used to detect the disconnect
+        func: Bound agent method to call
+        *args, **kwargs: Arguments passed to the method
+        
+    Returns:
+        The method's return value
+        
+    Raises:
+        AnalysisCancelled: If the client disconnected before the method finished
+    """
+    cancel_event = threading.Event()
+    task = asyncio.ensure_future(run_agent_call(func, *args, cancel_event=cancel_event, **kwargs))
+    
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await http_request.is_disconnected():
+            cancel_event.set()
+            # The worker thread can't be interrupted; wait for it to notice the event
+            return await task
+
+
+def project_similar_tests(similar_tests: List[Dict[str, Any]], fields: Optional[List[str]]) -> List[Dict[str, Any]]:
+    """
+    Keep only the requested test case fields in each similar test entry.
+    
+    Args:
+        similar_tests: Entries with 'test_case' and 'similarity_score' keys
+        fields: Test case fields to keep (None or empty keeps everything)
+        
+    Returns:
+        Entries with the projected test cases
+    """
+    if not fields:
+        return similar_tests
+    return [
+        {
+            'test_case': {field: item['test_case'][field] for field in fields if field in item['test_case']},
+            'similarity_score': item['similarity_score']
+        }
+        for item in similar_tests
+    ]
+
+
+def model_response(model: BaseModel) -> ORJSONResponse:
+    """
+    Return a response model as JSON without FastAPI re-validating it.
+    
+    Returning a Response skips the route's response_model validation and jsonable_encoder
+    pass; the response_model still documents the schema in OpenAPI.
+    
+    Args:
+        model: Response model instance built by the endpoint
+        
+    Returns:
+        ORJSONResponse with the model's fields
+    """
+    return ORJSONResponse(content=model.model_dump())
+
+
+def build_tfs_headers() -> Dict[str, str]:
+    """Build authorization headers for TFS API calls."""
     if not TFS_PAT:
         return {}
     # Azure DevOps uses Basic auth with PAT
@@ -82,8 +224,8 @@ def get_tfs_headers():
     }
 
 
-def get_github_headers():
-    """Get authorization headers for GitHub API calls."""
+def build_github_headers() -> Dict[str, str]:
+    """Build authorization headers for GitHub API calls."""
     headers = {
         "Accept": "application/vnd.github.v3+json",
         "X-GitHub-Api-Version": "2022-11-28"
@@ -93,6 +235,28 @@ def get_github_headers():
     return headers
 
 
+# The tokens are fixed for the process lifetime, so the headers are built once
+TFS_HEADERS = build_tfs_headers()
+GITHUB_HEADERS = build_github_headers()
+
+
+def get_tfs_headers() -> Dict[str, str]:
+    """Get authorization headers for TFS API calls (shared; don't modify)."""
+    return TFS_HEADERS
+
+
+def get_github_headers() -> Dict[str, str]:
+    """Get authorization headers for GitHub API calls (shared; don't modify)."""
+    return GITHUB_HEADERS
+
+
+# Bug IDs are "#" followed by at least 3 digits (so "#1"-style references in commit messages
+# don't match)
+BUG_ID_PATTERN = re.compile(r'#(\d{3,})')
+HTML_TAG_PATTERN = re.compile(r'<[^>]+>')
+BLANK_LINES_PATTERN = re.compile(r'\n\s*\n')
+
+
 def extract_bug_id_from_text(text: str) -> Optional[str]:
     """Extract bug ID from text (looks for #number pattern).
     
@@ -104,14 +268,10 @@ def extract_bug_id_from_text(text: str) -> Optional[str]:
     if not text:
         return None
     
-    # Pattern to match bug IDs with # prefix
-    # Looks for # followed by digits (at least 1 digit)
-    # Avoids matching things like "#1" in commit hashes by requiring at least 3 digits for bug IDs
-    pattern = r'#(\d{3,})'
-    
-    matches = re.findall(pattern, text)
-    if matches:
-        return matches[0]  # Return the first bug ID found
+    # Stop at the first bug ID rather than collecting every match
+    match = BUG_ID_PATTERN.search(text)
+    if match:
+        return match.group(1)
     
     return None
 
@@ -121,11 +281,12 @@ def extract_html_text(html_content: str) -> str:
     if not html_content:
         return ""
     # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '\n', html_content)
-    # Decode HTML entities
-    text = text.replace('&nbsp;', ' ').replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
+    text = HTML_TAG_PATTERN.sub('\n', html_content)
+    # Decode HTML entities (after stripping tags, so decoded '<' isn't mistaken for markup);
+    # &nbsp; decodes to U+00A0, which is kept as a plain space
+    text = html.unescape(text).replace('\xa0', ' ')
     # Clean up whitespace
-    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = BLANK_LINES_PATTERN.sub('\n\n', text)
     return text.strip()
 
 
@@ -137,6 +298,10 @@ class BugReportRequest(BaseModel):
     top_k: int = Field(default=15, ge=1, le=50, description="Number of similar test cases to analyze")
     similarity_threshold: float = Field(default=0.5, ge=0.0, le=1.0, description="Minimum similarity score")
     output_format: str = Field(default="csv", description="Output format: 'dict' or 'csv'")
+    fields: Optional[List[str]] = Field(
+        default=None,
+        description="Test case fields to include in similar_tests, e.g. ['id', 'title'] (default: all fields)"
+    )
 
 
 class AnalysisResponse(BaseModel):
@@ -208,10 +373,18 @@ async def startup_event():
     global agent
     try:
         agent = TestCaseAgent(use_mcp=True)
-        print("[OK] Agent initialized successfully")
-    except Exception as e:
-        print(f"[FAIL] Failed to initialize agent: {e}")
-        traceback.print_exc()
+        logger.info("Agent initialized successfully")
+    except Exception:
+        logger.exception("Failed to initialize agent")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the shared HTTP client's connections"""
+    global http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
 
 
 @app.get("/", response_model=Dict[str, str])
@@ -244,11 +417,12 @@ async def health_check():
 
 
 @app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_bug_report(request: BugReportRequest):
+async def analyze_bug_report(request: BugReportRequest, response: Response, http_request: Request):
     """
     Analyze a bug report and find related test cases (JSON-based endpoint)
     
-    Returns similar test cases, Claude analysis, and exports to CSV
+    Returns similar test cases, Claude analysis, and exports to CSV.
+    The X-Cache header is HIT when the agent reused a cached analysis.
     """
     if agent is None:
         raise HTTPException(status_code=503, detail="Agent not initialized")
@@ -259,8 +433,10 @@ async def analyze_bug_report(request: BugReportRequest):
         csv_filename = f"bug_analysis_{timestamp}.csv"
         csv_path = os.path.join(os.getcwd(), csv_filename)
         
-        # Run analysis
-        results = agent.analyze_bug_report(
+        # Run analysis off the event loop, abandoning it if the client disconnects
+        results = await run_cancellable_agent_call(
+            http_request,
+            agent.analyze_bug_report,
             bug_description=request.bug_description,
             repro_steps=request.repro_steps,
             code_changes=request.code_changes,
@@ -275,17 +451,23 @@ async def analyze_bug_report(request: BugReportRequest):
         if 'error' in results:
             raise HTTPException(status_code=400, detail=results['error'])
         
+        response.headers["X-Cache"] = "HIT" if results.get('cached') else "MISS"
+        
         # Prepare response
         return AnalysisResponse(
             success=True,
             message="Analysis completed successfully",
             summary=results.get('summary'),
             csv_path=results.get('csv_path'),
-            similar_tests=results.get('similar_tests', [])[:10]  # Return top 10 for preview
+            similar_tests=project_similar_tests(results.get('similar_tests', [])[:10], request.fields)  # Top 10 preview
         )
         
+    except AnalysisCancelled:
+        # Nobody is left to read a response, so don't build one; the log records the disconnect
+        logger.info("/analyze client disconnected, analysis cancelled")
+        return Response(status_code=204)
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("Analysis failed")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
@@ -316,9 +498,7 @@ async def parse_bug_context(
             detail="AWS_BEARER_TOKEN_BEDROCK not configured in .env file"
         )
     
-    print("\n" + "="*80)
-    print("[AI] /parse-bug-context - Using Claude (Bedrock) to extract structured information")
-    print("="*80)
+    logger.info("/parse-bug-context - Using Claude (Bedrock) to extract structured information")
     
     try:
         client = get_claude_client()
@@ -358,43 +538,39 @@ Provide your response in JSON format with these exact keys:
         
         # Parse JSON response
         try:
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = response_text[start_idx:end_idx]
-                parsed_data = json.loads(json_str)
+            # Decode only the first complete JSON object, ignoring any prose around it
+            parsed_data = parse_claude_json(response_text)
+            if isinstance(parsed_data, dict):
                 
-                print(f"[OK] Successfully parsed bug context")
-                print(f"  Confidence: {parsed_data.get('confidence', 'unknown')}")
-                print(f"  Bug Description: {parsed_data.get('bug_description', '')[:100]}...")
-                print("="*80 + "\n")
+                logger.info("Parsed bug context (confidence: %s)", parsed_data.get('confidence', 'unknown'))
+                logger.debug("Bug description: %.100s", parsed_data.get('bug_description', ''))
                 
-                return ParsedBugContext(
+                return model_response(ParsedBugContext(
                     bug_description=parsed_data.get('bug_description', ''),
                     repro_steps=parsed_data.get('repro_steps', ''),
                     code_changes=parsed_data.get('code_changes', ''),
                     confidence=parsed_data.get('confidence', 'medium'),
                     notes=parsed_data.get('notes', '')
-                )
+                ))
             else:
-                raise ValueError("No JSON found in response")
-        except (json.JSONDecodeError, ValueError) as e:
-            print(f"[WARN] Could not parse JSON response: {e}")
-            # Fallback: return raw content with low confidence
-            return ParsedBugContext(
+                raise ValueError("No complete JSON object found in response")
+        except ValueError as e:
+            logger.warning("Could not parse JSON response: %s", e)
+            # Fallback: return raw content with low confidence (built from known strings, so no validation)
+            return model_response(ParsedBugContext.model_construct(
                 bug_description=bug_info[:500] if bug_info else "Could not extract bug description",
                 repro_steps="Reproduction steps not provided",
                 code_changes=pr_info[:500] if pr_info else "Code changes not provided",
                 confidence="low",
                 notes=f"Failed to parse LLM response: {str(e)}"
-            )
+            ))
     
     except Exception as e:
         error_msg = str(e)
         if "Bedrock" in error_msg:
-            print(f"[FAIL] Bedrock API error: {error_msg}")
+            logger.error("Bedrock API error: %s", error_msg)
             raise HTTPException(status_code=500, detail=f"AI API error: {error_msg}")
-        print(f"[FAIL] Error parsing bug context: {error_msg}")
+        logger.error("Error parsing bug context: %s", error_msg)
         raise HTTPException(status_code=500, detail=f"Failed to parse bug context: {error_msg}")
 
 
@@ -430,16 +606,13 @@ async def analyze_bug(
     Returns:
         Comprehensive analysis including related tests, suggested updates, and duplicates
     """
-    # Print API inputs for debugging
-    print("\n" + "="*80)
-    print("📥 /analyze-bug API REQUEST INPUTS")
-    print("="*80)
-    print(f"Bug Description: {bug_description[:200]}{'...' if len(bug_description) > 200 else ''}")
-    print(f"Repro Steps: {repro_steps[:200]}{'...' if len(repro_steps) > 200 else ''}")
-    print(f"Code Changes: {code_changes[:200]}{'...' if len(code_changes) > 200 else ''}")
-    print(f"Top K: {top_k}")
-    print(f"CSV File: {csv_file.filename if csv_file else 'None (auto-detection mode)'}")
-    print("="*80 + "\n")
+    # Log API inputs for debugging
+    logger.debug(
+        "/analyze-bug inputs - Bug Description: %.200s | Repro Steps: %.200s | Code Changes: %.200s | "
+        "Top K: %d | CSV File: %s",
+        bug_description, repro_steps, code_changes, top_k,
+        csv_file.filename if csv_file else 'None (auto-detection mode)'
+    )
     
     try:
         # Get agent instance
@@ -452,49 +625,52 @@ async def analyze_bug(
                 raise HTTPException(status_code=400, detail="File must be a CSV")
             
             # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.csv') as tmp_file:
-                content = await csv_file.read()
-                tmp_file.write(content)
-                tmp_path = tmp_file.name
+            tmp_path = await run_in_threadpool(save_upload_to_temp_file, csv_file.file)
             
             try:
-                # Load test cases from CSV
-                print(f"Loading test cases from {csv_file.filename}...")
-                agent_instance.load_test_cases_from_csv(tmp_path)
-                
                 # Generate unique filename for CSV export
                 timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
                 csv_filename = f"bug_analysis_{timestamp}.csv"
                 csv_path = os.path.join(os.getcwd(), csv_filename)
                 
-                # Run analysis with auto_load=False since we manually loaded
-                print("Running bug analysis...")
-                results = agent_instance.analyze_bug_report(
-                    bug_description=bug_description,
-                    repro_steps=repro_steps,
-                    code_changes=code_changes,
-                    top_k=top_k,
-                    auto_load=False,
-                    output_format='csv',
-                    csv_output_path=csv_path
-                )
+                # Loading and analysis run as one agent call so no other request can swap
+                # the loaded test cases in between
+                def load_and_analyze():
+                    # Load test cases from CSV
+                    logger.info("Loading test cases from %s...", csv_file.filename)
+                    agent_instance.load_test_cases_from_csv(tmp_path)
+                    
+                    # Run analysis with auto_load=False since we manually loaded
+                    logger.info("Running bug analysis...")
+                    return agent_instance.analyze_bug_report(
+                        bug_description=bug_description,
+                        repro_steps=repro_steps,
+                        code_changes=code_changes,
+                        top_k=top_k,
+                        auto_load=False,
+                        output_format='csv',
+                        csv_output_path=csv_path
+                    )
+                
+                results = await run_agent_call(load_and_analyze)
                 
             finally:
                 # Clean up temporary file
                 try:
                     os.unlink(tmp_path)
                 except Exception as e:
-                    print(f"Warning: Could not delete temporary file: {e}")
+                    logger.warning("Could not delete temporary file: %s", e)
         else:
             # Auto-detection mode - let the agent detect and load relevant test cases
-            print("Auto-detection mode: detecting relevant test cases...")
+            logger.info("Auto-detection mode: detecting relevant test cases...")
             
             # Generate unique filename for CSV export
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             csv_filename = f"bug_analysis_{timestamp}.csv"
             csv_path = os.path.join(os.getcwd(), csv_filename)
             
-            results = agent_instance.analyze_bug_report(
+            results = await run_agent_call(
+                agent_instance.analyze_bug_report,
                 bug_description=bug_description,
                 repro_steps=repro_steps,
                 code_changes=code_changes,
@@ -504,41 +680,58 @@ async def analyze_bug(
                 csv_output_path=csv_path
             )
         
-        print("Analysis complete!")
+        logger.info("Analysis complete")
         
         # Add CSV download information to the response
         if 'csv_path' in results:
             results['csv_filename'] = os.path.basename(results['csv_path'])
             results['download_url'] = f"/download/{results['csv_filename']}"
         
-        return JSONResponse(content=results)
+        return ORJSONResponse(
+            content=results,
+            headers={"X-Cache": "HIT" if results.get('cached') else "MISS"}
+        )
     
     except Exception as e:
-        print(f"Error during analysis: {str(e)}")
+        logger.error("Error during analysis: %s", e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 
 @app.get("/download/{filename}")
-async def download_csv(filename: str):
+async def download_csv(filename: str, request: Request):
     """
     Download a generated CSV file
     
+    Repeat downloads that send the file's ETag in If-None-Match get an empty 304 response.
+    
     Args:
         filename: Name of the CSV file to download
     """
     file_path = os.path.join(os.getcwd(), filename)
     
-    if not os.path.exists(file_path):
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
         raise HTTPException(status_code=404, detail="File not found")
     
     if not filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files can be downloaded")
     
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=3600"
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    
     return FileResponse(
         path=file_path,
         media_type='text/csv',
         filename=filename,
-        headers={"Content-Disposition": f"attachment; filename={filename}"}
+        stat_result=stat_result,
+        headers={**headers, "Content-Disposition": f"attachment; filename={filename}"}
     )
 
 
@@ -553,7 +746,7 @@ async def get_statistics():
     
     try:
         stats = agent.mcp_server.get_statistics()
-        return JSONResponse(content=stats)
+        return ORJSONResponse(content=stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get statistics: {str(e)}")
 
@@ -569,7 +762,7 @@ async def list_areas():
     
     try:
         areas_info = agent.mcp_server.list_areas()
-        return JSONResponse(content=areas_info)
+        return ORJSONResponse(content=areas_info)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list areas: {str(e)}")
 
@@ -591,7 +784,7 @@ async def detect_relevant_areas(bug_description: str, repro_steps: str = ""):
     
     try:
         detection = agent.mcp_server.detect_relevant_areas(bug_description, repro_steps)
-        return JSONResponse(content=detection)
+        return ORJSONResponse(content=detection)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to detect areas: {str(e)}")
 
@@ -620,11 +813,11 @@ async def detect_area(
             detection = agent_instance.mcp_server.detect_relevant_areas(
                 bug_description, repro_steps
             )
-            return JSONResponse(content=detection)
+            return ORJSONResponse(content=detection)
         else:
             raise HTTPException(status_code=501, detail="MCP is not enabled")
     except Exception as e:
-        print(f"Error detecting area: {str(e)}")
+        logger.error("Error detecting area: %s", e)
         raise HTTPException(status_code=500, detail=f"Area detection failed: {str(e)}")
 
 
@@ -650,23 +843,25 @@ async def detect_duplicates(
         agent_instance = get_agent()
         
         # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.csv') as tmp_file:
-            content = await csv_file.read()
-            tmp_file.write(content)
-            tmp_path = tmp_file.name
+        tmp_path = await run_in_threadpool(save_upload_to_temp_file, csv_file.file)
         
         try:
-            # Load test cases
-            print(f"Loading test cases from {csv_file.filename}...")
-            agent_instance.load_test_cases_from_csv(tmp_path)
+            # Loading and detection run as one agent call so no other request can swap
+            # the loaded test cases in between
+            def load_and_detect():
+                # Load test cases
+                logger.info("Loading test cases from %s...", csv_file.filename)
+                agent_instance.load_test_cases_from_csv(tmp_path)
+                
+                # Detect duplicates
+                logger.info("Detecting duplicates...")
+                return agent_instance.detect_duplicates_with_claude(
+                    similarity_threshold=similarity_threshold
+                )
             
-            # Detect duplicates
-            print("Detecting duplicates...")
-            duplicates = agent_instance.detect_duplicates_with_claude(
-                similarity_threshold=similarity_threshold
-            )
+            duplicates = await run_agent_call(load_and_detect)
             
-            return JSONResponse(content={
+            return ORJSONResponse(content={
                 "duplicate_groups": duplicates,
                 "total_duplicates_found": len(duplicates)
             })
@@ -675,10 +870,10 @@ async def detect_duplicates(
             try:
                 os.unlink(tmp_path)
             except Exception as e:
-                print(f"Warning: Could not delete temporary file: {e}")
+                logger.warning("Could not delete temporary file: %s", e)
     
     except Exception as e:
-        print(f"Error detecting duplicates: {str(e)}")
+        logger.error("Error detecting duplicates: %s", e)
         raise HTTPException(status_code=500, detail=f"Duplicate detection failed: {str(e)}")
 
 
@@ -699,14 +894,18 @@ async def fetch_bug_info(bug_id: str):
             detail="TFS configuration missing. Please set TFS_BASE_URL, TFS_COLLECTION, TFS_PROJECT, and TFS_PAT in .env file"
         )
     
+    cached = get_cached_lookup(("bug", bug_id))
+    if cached is not None:
+        return model_response(cached)
+    
     try:
         # TFS REST API endpoint for work items
         url = f"{TFS_BASE_URL}/{TFS_COLLECTION}/{TFS_PROJECT}/_apis/wit/workitems/{bug_id}?api-version=4.1&$expand=all"
         
-        print(f"Fetching bug info from: {url}")
+        logger.info("Fetching bug info from: %s", url)
         
         headers = get_tfs_headers()
-        response = requests.get(url, headers=headers, timeout=30)
+        response = await get_http_client().get(url, headers=headers)
         
         if response.status_code == 404:
             raise HTTPException(status_code=404, detail=f"Bug {bug_id} not found")
@@ -728,29 +927,152 @@ async def fetch_bug_info(bug_id: str):
         description = extract_html_text(fields.get("System.Description", ""))
         repro_steps = extract_html_text(fields.get("Microsoft.VSTS.TCM.ReproSteps", ""))
         
-        return {
-            "bug_id": bug_id,
-            "title": title,
-            "description": description,
-            "repro_steps": repro_steps
-        }
+        # Every field is a string we just extracted, so skip re-validation
+        bug_info = BugInfoResponse.model_construct(
+            bug_id=bug_id,
+            title=title,
+            description=description,
+            repro_steps=repro_steps
+        )
+        cache_lookup(("bug", bug_id), bug_info)
+        return model_response(bug_info)
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="TFS request timed out")
-    except requests.exceptions.ConnectionError:
+    except httpx.NetworkError:
         raise HTTPException(status_code=503, detail="Could not connect to TFS server")
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error fetching bug info: {str(e)}")
+        logger.error("Error fetching bug info: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to fetch bug info: {str(e)}")
 
 
+async def fetch_linked_bug_info(bug_id: str) -> Optional[BugInfoResponse]:
+    """
+    Fetch the bug referenced by a PR from TFS, for inclusion in the PR info.
+    
+    Failures are logged and treated as "no bug info" so they never fail the PR request.
+    
+    Args:
+        bug_id: Work item ID extracted from the PR description
+        
+    Returns:
+        Bug information, or None if TFS isn't configured or the fetch failed
+    """
+    try:
+        if TFS_BASE_URL and TFS_COLLECTION and TFS_PROJECT and TFS_PAT:
+            url = f"{TFS_BASE_URL}/{TFS_COLLECTION}/{TFS_PROJECT}/_apis/wit/workitems/{bug_id}?api-version=4.1&$expand=all"
+            headers = get_tfs_headers()
+            bug_response = await get_http_client().get(url, headers=headers)
+            
+            if bug_response.status_code == 200:
+                work_item = bug_response.json()
+                fields = work_item.get("fields", {})
+                
+                title = fields.get("System.Title", "No title")
+                description_html = fields.get("System.Description", "") or fields.get("Microsoft.VSTS.TCM.ReproSteps", "") or ""
+                repro_steps_html = fields.get("Microsoft.VSTS.TCM.ReproSteps", "") or ""
+                
+                description = extract_html_text(description_html)
+                repro_steps = extract_html_text(repro_steps_html)
+                
+                logger.info("Fetched bug info for #%s", bug_id)
+                return BugInfoResponse.model_construct(
+                    bug_id=bug_id,
+                    title=title,
+                    description=description,
+                    repro_steps=repro_steps
+                )
+            else:
+                logger.warning("Could not fetch bug info for #%s: HTTP %d", bug_id, bug_response.status_code)
+        else:
+            logger.warning("TFS not configured, skipping bug info fetch")
+    except Exception as e:
+        logger.warning("Error fetching bug info for #%s: %s", bug_id, e)
+    return None
+
+
+# Successful bug and PR lookups are reused for a few minutes, so UI refreshes don't repeat the
+# TFS, GitHub and Claude round-trips
+LOOKUP_CACHE_TTL_SECONDS = 300
+LOOKUP_CACHE_MAX_ENTRIES = 2048
+lookup_cache: "OrderedDict[Tuple[Any, ...], Tuple[float, BaseModel]]" = OrderedDict()
+
+
+def get_cached_lookup(key: Tuple[Any, ...]) -> Optional[BaseModel]:
+    """Return a cached lookup result, or None if it is missing or older than the TTL."""
+    entry = lookup_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if time.monotonic() >= expires_at:
+        del lookup_cache[key]
+        return None
+    return value
+
+
+def cache_lookup(key: Tuple[Any, ...], value: BaseModel) -> None:
+    """Cache a successful lookup result, evicting the oldest entries beyond the size limit."""
+    lookup_cache[key] = (time.monotonic() + LOOKUP_CACHE_TTL_SECONDS, value)
+    lookup_cache.move_to_end(key)
+    while len(lookup_cache) > LOOKUP_CACHE_MAX_ENTRIES:
+        lookup_cache.popitem(last=False)
+
+
+# In-flight /fetch-pr-info requests by (owner, repo, PR number); concurrent requests for the
+# same PR share one set of GitHub, TFS and Claude calls
+pr_info_in_flight: Dict[Tuple[str, str, int], "asyncio.Task[PRInfoResponse]"] = {}
+
+
+def finish_pr_info_task(key: Tuple[str, str, int], task: "asyncio.Task[PRInfoResponse]") -> None:
+    """
+    Done callback for a shared PR info fetch.
+    
+    Stops sharing the task and caches its result. Retrieving the exception here means a
+    fetch that fails after every waiting client disconnected is never reported as
+    "Task exception was never retrieved".
+    
+    Args:
+        key: (owner, repo, PR number) the task was registered under
+        task: The finished build_pr_info task
+    """
+    pr_info_in_flight.pop(key, None)
+    if not task.cancelled() and task.exception() is None:
+        cache_lookup(("pr",) + key, task.result())
+
+
 @app.get("/fetch-pr-info/{pr_number}", response_model=PRInfoResponse)
 async def fetch_pr_info(pr_number: int):
     """
     Fetch Pull Request information from GitHub including changed files and AI-generated summary.
     
+    Args:
+        pr_number: The PR number to fetch
+        
+    Returns:
+        PR information including title, state, list of changed files, and AI summary
+    """
+    key = (GITHUB_OWNER, GITHUB_REPO, pr_number)
+    cached = get_cached_lookup(("pr",) + key)
+    if cached is not None:
+        return model_response(cached)
+    
+    task = pr_info_in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(build_pr_info(pr_number))
+        pr_info_in_flight[key] = task
+        task.add_done_callback(lambda done: finish_pr_info_task(key, done))
+    
+    # Shield so one client disconnecting doesn't cancel the fetch for the others
+    pr_info = await asyncio.shield(task)
+    return model_response(pr_info)
+
+
+async def build_pr_info(pr_number: int) -> PRInfoResponse:
+    """
+    Fetch a PR's details and files from GitHub, summarize it with Claude, and look up its bug.
+    
     Args:
         pr_number: The PR number to fetch
         
@@ -774,13 +1096,16 @@ async def fetch_pr_info(pr_number: int):
         pr_url = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/pulls/{pr_number}"
         files_url = f"https://api.github.com/repos/{GITHUB_OWNER}/{GITHUB_REPO}/pulls/{pr_number}/files"
         
-        print(f"GitHub Config - Owner: {GITHUB_OWNER}, Repo: {GITHUB_REPO}")
-        print(f"Fetching PR info from: {pr_url}")
+        logger.debug("GitHub Config - Owner: %s, Repo: %s", GITHUB_OWNER, GITHUB_REPO)
+        logger.info("Fetching PR info from: %s", pr_url)
         
         headers = get_github_headers()
         
-        # Fetch PR details
-        pr_response = requests.get(pr_url, headers=headers, timeout=30)
+        # Fetch PR details and changed files (with patches) concurrently
+        pr_response, files_response = await asyncio.gather(
+            get_http_client().get(pr_url, headers=headers),
+            get_http_client().get(files_url, headers=headers)
+        )
         
         if pr_response.status_code == 404:
             error_detail = f"PR #{pr_number} not found in {GITHUB_OWNER}/{GITHUB_REPO}"
@@ -802,9 +1127,6 @@ async def fetch_pr_info(pr_number: int):
         pr_title = pr_data.get("title", "")
         pr_body = pr_data.get("body", "") or ""
         
-        # Fetch changed files with patches
-        files_response = requests.get(files_url, headers=headers, timeout=30)
-        
         if files_response.status_code != 200:
             raise HTTPException(
                 status_code=files_response.status_code,
@@ -851,7 +1173,7 @@ Diff:
 """)
         
         # Generate AI summary of changes
-        print("Generating AI summary of PR changes...")
+        logger.info("Generating AI summary of PR changes...")
         changes_text = "\n---\n".join(file_summaries)
         
         prompt = f"""Analyze this Pull Request and provide a clear, concise summary of the changes.
@@ -869,54 +1191,24 @@ Please provide:
 
 Keep the summary concise but informative."""
 
-        # Call Claude API via Bedrock
-        client = get_claude_client()
-        
-        summary = client.create_message(
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=2048
-        )
-        print("[OK] AI summary generated successfully")
-        
         # Extract bug ID from PR description
         bug_id = extract_bug_id_from_text(pr_body)
-        bug_info = None
-        
         if bug_id:
-            print(f"[OK] Found bug ID #{bug_id} in PR description")
-            # Try to fetch bug info from TFS
-            try:
-                if TFS_BASE_URL and TFS_COLLECTION and TFS_PROJECT and TFS_PAT:
-                    url = f"{TFS_BASE_URL}/{TFS_COLLECTION}/{TFS_PROJECT}/_apis/wit/workitems/{bug_id}?api-version=4.1&$expand=all"
-                    headers = get_tfs_headers()
-                    bug_response = requests.get(url, headers=headers, timeout=30)
-                    
-                    if bug_response.status_code == 200:
-                        work_item = bug_response.json()
-                        fields = work_item.get("fields", {})
-                        
-                        title = fields.get("System.Title", "No title")
-                        description_html = fields.get("System.Description", "") or fields.get("Microsoft.VSTS.TCM.ReproSteps", "") or ""
-                        repro_steps_html = fields.get("Microsoft.VSTS.TCM.ReproSteps", "") or ""
-                        
-                        description = extract_html_text(description_html)
-                        repro_steps = extract_html_text(repro_steps_html)
-                        
-                        bug_info = BugInfoResponse(
-                            bug_id=bug_id,
-                            title=title,
-                            description=description,
-                            repro_steps=repro_steps
-                        )
-                        print(f"[OK] Fetched bug info for #{bug_id}")
-                    else:
-                        print(f"[WARN] Could not fetch bug info for #{bug_id}: HTTP {bug_response.status_code}")
-                else:
-                    print("[WARN] TFS not configured, skipping bug info fetch")
-            except Exception as e:
-                print(f"[WARN] Error fetching bug info for #{bug_id}: {str(e)}")
+            logger.info("Found bug ID #%s in PR description", bug_id)
         else:
-            print("[INFO] No bug ID found in PR description")
+            logger.info("No bug ID found in PR description")
+        
+        # Call Claude API via Bedrock on a worker thread, fetching the bug info from TFS meanwhile
+        client = get_claude_client()
+        summary, bug_info = await asyncio.gather(
+            run_in_threadpool(
+                client.create_message,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=2048
+            ),
+            fetch_linked_bug_info(bug_id) if bug_id else asyncio.sleep(0)
+        )
+        logger.info("AI summary generated successfully")
         
         return PRInfoResponse(
             pr_number=pr_number,
@@ -931,14 +1223,14 @@ Keep the summary concise but informative."""
             bug_info=bug_info
         )
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="GitHub request timed out")
-    except requests.exceptions.ConnectionError:
+    except httpx.NetworkError:
         raise HTTPException(status_code=503, detail="Could not connect to GitHub")
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[ERROR] Error fetching PR info: {str(e)}")
+        logger.error("Error fetching PR info: %s", e)
         raise HTTPException(status_code=500, detail=f"AI API error: {str(e)}")
 
 
@@ -973,7 +1265,7 @@ async def summarize_pr_changes(pr_number: int):
         headers = get_github_headers()
         
         # Fetch PR details
-        pr_response = requests.get(pr_url, headers=headers, timeout=30)
+        pr_response = await get_http_client().get(pr_url, headers=headers)
         
         if pr_response.status_code == 404:
             raise HTTPException(status_code=404, detail=f"PR #{pr_number} not found")
@@ -989,7 +1281,7 @@ async def summarize_pr_changes(pr_number: int):
         pr_body = pr_data.get("body", "") or ""
         
         # Fetch changed files with patches
-        files_response = requests.get(files_url, headers=headers, timeout=30)
+        files_response = await get_http_client().get(files_url, headers=headers)
         
         if files_response.status_code != 200:
             raise HTTPException(
@@ -1056,14 +1348,14 @@ Keep the summary concise but informative."""
             total_files=len(files_data)
         )
         
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         raise HTTPException(status_code=504, detail="GitHub request timed out")
-    except requests.exceptions.ConnectionError:
+    except httpx.NetworkError:
         raise HTTPException(status_code=503, detail="Could not connect to GitHub")
     except HTTPException:
         raise
     except Exception as e:
-        print(f"[ERROR] Error summarizing PR: {str(e)}")
+        logger.error("Error summarizing PR: %s", e)
         raise HTTPException(status_code=500, detail=f"AI API error: {str(e)}")
 
 
@@ -1086,10 +1378,17 @@ if __name__ == "__main__":
     print("  - Health Check: http://localhost:8000/health")
     print("\n" + "="*80 + "\n")
     
+    # Auto-reload only for development (DEV=1); otherwise run WEB_CONCURRENCY worker processes.
+    # Each worker loads its own agent and embedding model, so size this to the available memory.
+    # loop/http "auto" already pick uvloop and httptools when installed (uvicorn[standard]).
+    dev_mode = os.getenv("DEV", "") == "1"
     uvicorn.run(
         "api:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=dev_mode,
+        workers=None if dev_mode else int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="auto",
+        http="auto",
         log_level="info"
     )
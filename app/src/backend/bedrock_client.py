@@ -5,14 +5,20 @@ This module provides a wrapper for calling Claude models via AWS Bedrock
 using bearer token authentication (AWS_BEARER_TOKEN_BEDROCK).
 """
 
+import base64
 import json
 import os
 import requests
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Iterator, Optional
+from botocore.eventstream import EventStreamBuffer
 
 # Default model: Claude 3.5 Sonnet on Bedrock (cross-region inference profile)
 BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "us.anthropic.claude-3-5-sonnet-20241022-v2:0")
 
+# Shared HTTP session so Bedrock calls reuse pooled keep-alive connections instead of
+# paying a TCP + TLS handshake per request
+_http_session = requests.Session()
+
 
 def get_bedrock_endpoint(region: str, model_id: str) -> str:
     """
@@ -28,18 +34,35 @@ def get_bedrock_endpoint(region: str, model_id: str) -> str:
     return f"https://bedrock-runtime.{region}.amazonaws.com/model/{model_id}/invoke"
 
 
+def get_bedrock_stream_endpoint(region: str, model_id: str) -> str:
+    """
+    Get the Bedrock runtime endpoint URL for streaming responses.
+    
+    Args:
+        region: AWS region (e.g., 'us-east-1')
+        model_id: Model ID to invoke
+        
+    Returns:
+        Full URL for the invoke_model_with_response_stream API
+    """
+    return f"https://bedrock-runtime.{region}.amazonaws.com/model/{model_id}/invoke-with-response-stream"
+
+
 def invoke_claude(
-    messages: List[Dict[str, str]],
+    messages: List[Dict[str, Any]],
     max_tokens: int = 4096,
-    model_id: Optional[str] = None
+    model_id: Optional[str] = None,
+    system: Optional[List[Dict[str, Any]]] = None
 ) -> str:
     """
     Invoke Claude model on Bedrock using bearer token authentication.
     
     Args:
-        messages: List of message dicts with 'role' and 'content' keys
+        messages: List of message dicts with 'role' and 'content' keys (content may be a
+            string or a list of content blocks, e.g. with cache_control set)
         max_tokens: Maximum tokens in response (default: 4096)
         model_id: Model ID to use (defaults to BEDROCK_MODEL_ID)
+        system: Optional system prompt content blocks (may set cache_control)
         
     Returns:
         Response text from Claude
@@ -71,9 +94,11 @@ def invoke_claude(
         "max_tokens": max_tokens,
         "messages": messages
     }
+    if system:
+        body["system"] = system
     
     try:
-        response = requests.post(
+        response = _http_session.post(
             endpoint,
             headers=headers,
             json=body,
@@ -102,6 +127,102 @@ def invoke_claude(
         raise Exception(f"Bedrock API error: {str(e)}")
 
 
+def invoke_claude_stream(
+    messages: List[Dict[str, Any]],
+    max_tokens: int = 4096,
+    model_id: Optional[str] = None,
+    system: Optional[List[Dict[str, Any]]] = None
+) -> Iterator[str]:
+    """
+    Invoke Claude model on Bedrock and yield the response text as it is generated.
+    
+    Closing the returned generator early closes the HTTP connection, which stops
+    generation on the Bedrock side.
+    
+    Args:
+        messages: List of message dicts with 'role' and 'content' keys (content may be a
+            string or a list of content blocks, e.g. with cache_control set)
+        max_tokens: Maximum tokens in response (default: 4096)
+        model_id: Model ID to use (defaults to BEDROCK_MODEL_ID)
+        system: Optional system prompt content blocks (may set cache_control)
+        
+    Yields:
+        Text fragments of Claude's response, in order
+        
+    Raises:
+        ValueError: If AWS_BEARER_TOKEN_BEDROCK is not configured
+        Exception: If the Bedrock API call fails
+    """
+    bearer_token = os.getenv("AWS_BEARER_TOKEN_BEDROCK")
+    region = os.getenv("AWS_REGION", "us-east-1")
+    
+    if not bearer_token:
+        raise ValueError("AWS_BEARER_TOKEN_BEDROCK not configured")
+    
+    if model_id is None:
+        model_id = BEDROCK_MODEL_ID
+    
+    # Build request
+    endpoint = get_bedrock_stream_endpoint(region, model_id)
+    
+    headers = {
+        "Authorization": f"Bearer {bearer_token}",
+        "Content-Type": "application/json",
+        "Accept": "application/vnd.amazon.eventstream"
+    }
+    
+    body = {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "messages": messages
+    }
+    if system:
+        body["system"] = system
+    
+    try:
+        response = _http_session.post(
+            endpoint,
+            headers=headers,
+            json=body,
+            timeout=120,
+            stream=True
+        )
+        
+        try:
+            if response.status_code != 200:
+                error_detail = response.text
+                try:
+                    error_json = response.json()
+                    error_detail = error_json.get("message", response.text)
+                except:
+                    pass
+                raise Exception(f"{response.status_code} - {error_detail}")
+            
+            # Each event stream message wraps one Anthropic streaming event (base64 JSON)
+            event_buffer = EventStreamBuffer()
+            for data in response.iter_content(chunk_size=None):
+                event_buffer.add_data(data)
+                for message in event_buffer:
+                    payload = json.loads(message.payload)
+                    if message.headers.get(":message-type") == "exception":
+                        raise Exception(payload.get("message", message.payload.decode()))
+                    
+                    event = json.loads(base64.b64decode(payload["bytes"]))
+                    if event.get("type") == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                        yield event["delta"]["text"]
+        finally:
+            response.close()
+        
+    except requests.exceptions.Timeout:
+        raise Exception("Bedrock API request timed out")
+    except requests.exceptions.ConnectionError as e:
+        raise Exception(f"Could not connect to Bedrock: {str(e)}")
+    except Exception as e:
+        if "Bedrock" in str(e):
+            raise
+        raise Exception(f"Bedrock API error: {str(e)}")
+
+
 class BedrockClaudeClient:
     """
     A client wrapper that provides an interface similar to anthropic.Anthropic
@@ -114,11 +235,17 @@ class BedrockClaudeClient:
         """Initialize the Bedrock Claude client."""
         self._model_id = BEDROCK_MODEL_ID
     
+    @property
+    def model_id(self) -> str:
+        """Model ID used when a request doesn't name one."""
+        return self._model_id
+    
     def create_message(
         self,
-        messages: List[Dict[str, str]],
+        messages: List[Dict[str, Any]],
         max_tokens: int = 4096,
-        model: Optional[str] = None
+        model: Optional[str] = None,
+        system: Optional[List[Dict[str, Any]]] = None
     ) -> str:
         """
         Create a message using Claude via Bedrock.
@@ -127,15 +254,40 @@ class BedrockClaudeClient:
         but returns just the text content for simplicity.
         
         Args:
-            messages: List of message dicts with 'role' and 'content' keys
+            messages: List of message dicts with 'role' and 'content' keys (content may be a
+            string or a list of content blocks, e.g. with cache_control set)
             max_tokens: Maximum tokens in response
             model: Model ID (uses default if not specified)
+            system: Optional system prompt content blocks
             
         Returns:
             Response text from Claude
         """
         model_id = model if model else self._model_id
-        return invoke_claude(messages, max_tokens, model_id)
+        return invoke_claude(messages, max_tokens, model_id, system)
+    
+    def stream_message(
+        self,
+        messages: List[Dict[str, Any]],
+        max_tokens: int = 4096,
+        model: Optional[str] = None,
+        system: Optional[List[Dict[str, Any]]] = None
+    ) -> Iterator[str]:
+        """
+        Create a message using Claude via Bedrock, streaming the response text.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content' keys (content may be a
+            string or a list of content blocks, e.g. with cache_control set)
+            max_tokens: Maximum tokens in response
+            model: Model ID (uses default if not specified)
+            system: Optional system prompt content blocks
+            
+        Returns:
+            Generator yielding response text fragments as they arrive
+        """
+        model_id = model if model else self._model_id
+        return invoke_claude_stream(messages, max_tokens, model_id, system)
 
 
 # Singleton instance for easy access
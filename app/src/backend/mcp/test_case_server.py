@@ -6,7 +6,6 @@ to AI agents through standardized tools. The server allows dynamic querying
 and filtering of test cases based on various criteria.
 """
 
-import csv
 import json
 import re
 from typing import List, Dict, Any, Optional
@@ -21,10 +20,57 @@ from agent.area_config import (
     AREA_KEYWORDS,
     AREA_DESCRIPTIONS,
     AREA_PATH_PATTERNS,
+    AREA_PRIORITY,
+    KW_WEIGHT,
     get_all_areas,
-    get_csv_path
+    get_csv_path,
+    match_area_keywords
 )
 
+# CSV column name -> test case field name
+CSV_COLUMNS = {
+    'ID': 'id',
+    'Title': 'title',
+    'State': 'state',
+    'Area': 'area',
+    'Created Date': 'created_date',
+    'Description': 'description',
+    'Steps': 'steps'
+}
+
+
+def read_test_cases_csv(csv_path: str) -> List[Dict[str, Any]]:
+    """
+    Read test cases from a CSV file.
+    
+    The whole file is parsed by pandas' C parser and converted to records at once,
+    instead of building each test case row by row in Python.
+    Missing columns and short rows read as empty strings.
+    
+    Args:
+        csv_path: Path to the CSV file
+        
+    Returns:
+        List of test case dictionaries
+    """
+    # Imported here so importing the server (and the agent/API) doesn't pay for pandas up front
+    import pandas as pd
+    
+    # Opened in text mode so line endings inside quoted fields are normalized as before
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        try:
+            df = pd.read_csv(
+                f,
+                dtype=str,
+                keep_default_na=False,
+                usecols=lambda column: column in CSV_COLUMNS
+            )
+        except pd.errors.EmptyDataError:
+            return []
+    
+    df = df.reindex(columns=list(CSV_COLUMNS), fill_value='').fillna('')
+    return df.rename(columns=CSV_COLUMNS).to_dict(orient='records')
+
 
 class TestCaseServer:
     """
@@ -41,6 +87,7 @@ class TestCaseServer:
     def __init__(self):
         """Initialize the test case server."""
         self.test_cases_cache = {}
+        self.test_case_index = {}  # test case ID -> (area name, test case)
         self._load_all_test_cases()
     
     def _load_all_test_cases(self):
@@ -53,6 +100,10 @@ class TestCaseServer:
             except Exception as e:
                 print(f"Error loading {area_name}: {e}")
                 self.test_cases_cache[area_name] = []
+            
+            # Index by ID (first occurrence wins, matching area iteration order)
+            for tc in self.test_cases_cache[area_name]:
+                self.test_case_index.setdefault(tc['id'], (area_name, tc))
     
     def _load_csv(self, csv_path: str) -> List[Dict[str, Any]]:
         """
@@ -64,25 +115,11 @@ class TestCaseServer:
         Returns:
             List of test case dictionaries
         """
-        test_cases = []
-        
         try:
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    test_cases.append({
-                        'id': row.get('ID', ''),
-                        'title': row.get('Title', ''),
-                        'state': row.get('State', ''),
-                        'area': row.get('Area', ''),
-                        'created_date': row.get('Created Date', ''),
-                        'description': row.get('Description', ''),
-                        'steps': row.get('Steps', '')
-                    })
+            return read_test_cases_csv(csv_path)
         except Exception as e:
             print(f"Error reading CSV {csv_path}: {e}")
-        
-        return test_cases
+            return []
     
     def list_areas(self) -> Dict[str, Any]:
         """
@@ -210,13 +247,12 @@ class TestCaseServer:
         Returns:
             Dictionary containing the test case or error message
         """
-        for area_name, test_cases in self.test_cases_cache.items():
-            for tc in test_cases:
-                if tc['id'] == test_case_id:
-                    return {
-                        'test_case': {**tc, 'source_area': area_name},
-                        'found': True
-                    }
+        if test_case_id in self.test_case_index:
+            area_name, tc = self.test_case_index[test_case_id]
+            return {
+                'test_case': {**tc, 'source_area': area_name},
+                'found': True
+            }
         
         return {
             'test_case': None,
@@ -239,29 +275,34 @@ class TestCaseServer:
         Returns:
             Dictionary with detected areas and confidence scores
         """
-        combined_text = f"{bug_description} {repro_steps}".lower()
+        # Find which keywords from each area appear in the text
+        keyword_matches = match_area_keywords(f"{bug_description} {repro_steps}")
         
         area_scores = {}
         
         for area_name, keywords in AREA_KEYWORDS.items():
-            # Count how many keywords from this area appear in the text
-            matches = sum(1 for keyword in keywords if keyword.lower() in combined_text)
+            matched = keyword_matches.get(area_name, [])
+            
+            # Keywords shared between areas count fractionally, so a bug that only mentions
+            # terms like "WIP" or "invoice" doesn't make every area that lists them relevant
+            weight = sum(KW_WEIGHT[keyword] for keyword in matched)
             
-            # Require at least 2 keyword matches to consider an area relevant
-            if matches >= 2:
-                # Use absolute match count with diminishing returns for confidence
+            # Require at least 2 keyword matches' worth of evidence to consider an area relevant
+            if weight >= 2:
+                # Use weighted match count with diminishing returns for confidence
                 # This gives more weight to multiple strong matches
-                confidence = min(1.0, (matches * 0.15) + (matches * matches * 0.02))
+                confidence = min(1.0, (weight * 0.15) + (weight * weight * 0.02))
                 area_scores[area_name] = {
                     'confidence': round(confidence, 3),
-                    'matched_keywords': matches,
+                    'matched_keywords': len(matched),
+                    'keyword_weight': round(weight, 3),
                     'total_keywords': len(keywords)
                 }
         
-        # Sort by confidence (and by match count as tiebreaker)
+        # Sort by confidence, then match count, then AREA_PRIORITY (more specific areas first)
         sorted_areas = sorted(
             area_scores.items(),
-            key=lambda x: (x[1]['confidence'], x[1]['matched_keywords']),
+            key=lambda x: (x[1]['confidence'], x[1]['matched_keywords'], -AREA_PRIORITY.index(x[0])),
             reverse=True
         )
         
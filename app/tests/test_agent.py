@@ -0,0 +1,555 @@
+import unittest
+import os
+import sys
+import hashlib
+import tempfile
+import threading
+from collections import deque
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Add backend to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from agent import agent as agent_module
+
+
+class FakeEmbeddingModel:
+    """Stands in for SentenceTransformer: unit vectors seeded by a hash of each text, or fixed ones."""
+    
+    def __init__(self, dim=32, vectors=None):
+        self.dim = dim
+        self.vectors = vectors or {}
+        self.encoded = []
+    
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+    
+    def encode(self, texts, **options):
+        batch = [texts] if isinstance(texts, str) else list(texts)
+        self.encoded.extend(batch)
+        rows = np.vstack([self._vector(text) for text in batch]) if batch else np.empty((0, self.dim))
+        rows = rows.astype(np.float32)
+        return rows[0] if isinstance(texts, str) else rows
+    
+    def _vector(self, text):
+        vector = self.vectors.get(text)
+        if vector is None:
+            seed = int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+            vector = np.random.default_rng(seed).standard_normal(self.dim)
+        vector = np.asarray(vector, dtype=np.float64)
+        return vector / np.linalg.norm(vector)
+
+
+def make_agent(model=None, store=None):
+    """
+    Build a TestCaseAgent with a fake embedding model, without loading torch or calling Bedrock.
+    
+    Args:
+        model: Embedding model stand-in (default: FakeEmbeddingModel())
+        store: EmbeddingStore to persist embeddings in (default: none)
+    
+    Returns:
+        Agent with no test cases loaded
+    """
+    test_agent = agent_module.TestCaseAgent.__new__(agent_module.TestCaseAgent)
+    test_agent.embedding_model = model or FakeEmbeddingModel()
+    test_agent.embeddings_cache = agent_module._LRUCache(agent_module.EMBEDDING_CACHE_SIZE)
+    test_agent._embedding_store = store
+    test_agent._model_namespace = 'fake'
+    test_agent.client = mock.Mock(model_id='claude-test')
+    test_agent.use_mcp = False
+    test_agent.mcp_server = None
+    test_agent.test_cases = []
+    test_agent._bug_cache = deque(maxlen=agent_module.SEMANTIC_CACHE_SIZE)
+    test_agent._bug_cache_lookups = 0
+    test_agent._bug_cache_hits = 0
+    test_agent.invalidate_embeddings()
+    return test_agent
+
+
+def make_test_cases(n):
+    """Return n test cases spread over two areas."""
+    areas = ['Billing\\Workflow', 'Expert\\Disbursements']
+    return [
+        {
+            'id': str(i),
+            'title': f'Test case {i}',
+            'description': f'Checks behaviour {i}',
+            'steps': f'Step {i}',
+            'area': areas[i % len(areas)]
+        }
+        for i in range(n)
+    ]
+
+
+def make_indexed_agent(embeddings):
+    """
+    Build a TestCaseAgent around precomputed embeddings, without loading a model or Bedrock.
+    
+    Args:
+        embeddings: Unit-length rows, one per test case
+    
+    Returns:
+        (agent, test_cases) with every test case present in the embedding index
+    """
+    test_agent = agent_module.TestCaseAgent.__new__(agent_module.TestCaseAgent)
+    test_agent.invalidate_embeddings()
+    test_cases = [{'id': str(i), 'title': f'Test {i}'} for i in range(len(embeddings))]
+    test_agent.test_cases = test_cases
+    test_agent._indexed_test_cases = test_cases
+    test_agent._tc_rows = {id(tc): row for row, tc in enumerate(test_cases)}
+    test_agent._emb_matrix = embeddings
+    return test_agent, test_cases
+
+
+def clustered_embeddings(n, dim=32, seed=0):
+    """Return n unit vectors drawn around a few centres, so many pairs are near-duplicates."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((8, dim))
+    vectors = centres[rng.integers(0, len(centres), n)] + 0.15 * rng.standard_normal((n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def pair_ids(pairs):
+    """Reduce duplicate pairs to comparable (id, id, rounded score) tuples."""
+    return [
+        (p['test_case_1']['id'], p['test_case_2']['id'], round(p['similarity_score'], 4))
+        for p in pairs
+    ]
+
+
+class TestFindPotentialDuplicates(unittest.TestCase):
+    """Duplicate pair search, with and without FAISS."""
+    
+    def test_faiss_matches_dense_scan(self):
+        """The FAISS range search returns the same pairs as the blocked dense scan."""
+        if agent_module._load_faiss() is None:
+            self.skipTest("faiss is not installed")
+        test_agent, test_cases = make_indexed_agent(clustered_embeddings(300))
+        
+        with mock.patch.object(agent_module, 'FAISS_MIN_TEST_CASES', 10 ** 9):
+            dense = test_agent._find_potential_duplicates(test_cases, 0.9)
+        with mock.patch.object(agent_module, 'FAISS_MIN_TEST_CASES', 2):
+            with_faiss = test_agent._find_potential_duplicates(test_cases, 0.9)
+        
+        self.assertEqual(len(dense), 20)
+        self.assertEqual(pair_ids(with_faiss), pair_ids(dense))
+    
+    def test_dense_scan_spans_blocks(self):
+        """Pairs straddling DUPLICATE_BLOCK_SIZE blocks are found, each pair once with i < j."""
+        embeddings = clustered_embeddings(40, seed=1)
+        test_agent, test_cases = make_indexed_agent(embeddings)
+        
+        with mock.patch.object(agent_module, 'DUPLICATE_BLOCK_SIZE', 7):
+            pairs = test_agent._find_potential_duplicates(test_cases, 0.9)
+        
+        scores = embeddings @ embeddings.T
+        upper = np.triu(scores >= 0.9, k=1)
+        expected = sorted(scores[upper], reverse=True)[:20]
+        self.assertEqual([round(p['similarity_score'], 4) for p in pairs], [round(float(s), 4) for s in expected])
+        for pair in pairs:
+            self.assertLess(int(pair['test_case_1']['id']), int(pair['test_case_2']['id']))
+
+
+
+class TestOnnxInt8FileName(unittest.TestCase):
+    """Choosing the quantized ONNX export for the CPU."""
+    
+    def test_env_override(self):
+        """EMBEDDING_ONNX_FILE wins over CPU detection."""
+        with mock.patch.dict(os.environ, {'EMBEDDING_ONNX_FILE': 'onnx/custom.onnx'}):
+            self.assertEqual(agent_module._onnx_int8_file_name(), 'onnx/custom.onnx')
+    
+    def test_picks_first_supported_feature(self):
+        """The best export the CPU supports is chosen, and None when none fits."""
+        try:
+            from numpy._core._multiarray_umath import __cpu_features__
+        except ImportError:
+            from numpy.core._multiarray_umath import __cpu_features__
+        
+        with mock.patch.dict(os.environ, {'EMBEDDING_ONNX_FILE': ''}):
+            with mock.patch.dict(__cpu_features__, {'AVX512VNNI': False, 'AVX512_SKX': False, 'AVX2': True}):
+                self.assertEqual(agent_module._onnx_int8_file_name(), 'onnx/model_quint8_avx2.onnx')
+            with mock.patch.dict(__cpu_features__, {}, clear=True):
+                self.assertIsNone(agent_module._onnx_int8_file_name())
+
+
+
+class TestFindSimilarTestCases(unittest.TestCase):
+    """Vectorized similarity search against the stacked test case matrix."""
+    
+    BUG_DESCRIPTION = "Billing workflow approval fails"
+    REPRO_STEPS = "Open the bill and approve it"
+    
+    def expected_ranking(self, test_agent, top_k, min_similarity):
+        """Score every test case one at a time, as the search did before it was vectorized."""
+        bug_text = f"{self.BUG_DESCRIPTION} {self.REPRO_STEPS}"
+        model = test_agent.embedding_model
+        query = model.encode(bug_text)
+        scored = []
+        for tc in test_agent.test_cases:
+            text = f"{tc['title']} {tc['description']} {tc['steps']}"
+            score = float(np.dot(model.encode(text), query))
+            # "billing" and "workflow" both occur in the bug text; "expert" and "disbursements" don't
+            score = min(1.0, score + (0.15 if tc['area'].startswith('Billing') else -0.05))
+            if score >= min_similarity:
+                scored.append((tc['id'], round(score, 4)))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:top_k]
+    
+    def search(self, test_agent, top_k, min_similarity):
+        results = test_agent.find_similar_test_cases(
+            self.BUG_DESCRIPTION, self.REPRO_STEPS, top_k=top_k, min_similarity=min_similarity
+        )
+        return [(tc['id'], round(score, 4)) for tc, score in results]
+    
+    def test_matches_per_test_case_scoring(self):
+        """Matrix scoring, area boosts, threshold and top-k agree with scoring each test case."""
+        test_agent = make_agent()
+        test_agent.test_cases = make_test_cases(200)
+        
+        self.assertEqual(self.search(test_agent, 15, -0.2), self.expected_ranking(test_agent, 15, -0.2))
+        self.assertEqual(self.search(test_agent, 500, 0.1), self.expected_ranking(test_agent, 500, 0.1))
+    
+    def test_faiss_matches_dense_search(self):
+        """The FAISS range query returns the same ranking as the dense matrix product."""
+        if agent_module._load_faiss() is None:
+            self.skipTest("faiss is not installed")
+        test_agent = make_agent()
+        test_agent.test_cases = make_test_cases(200)
+        
+        with mock.patch.object(agent_module, 'FAISS_MIN_TEST_CASES', 10):
+            self.assertEqual(self.search(test_agent, 15, 0.0), self.expected_ranking(test_agent, 15, 0.0))
+    
+    def test_reload_rebuilds_matrix(self):
+        """Reassigning test_cases is picked up without calling compute_test_case_embeddings."""
+        test_agent = make_agent()
+        test_agent.test_cases = make_test_cases(20)
+        self.search(test_agent, 5, -1.0)
+        
+        test_agent.test_cases = make_test_cases(3)
+        self.assertEqual(len(self.search(test_agent, 5, -1.0)), 3)
+
+
+
+def fake_analysis(*args, **kwargs):
+    """Stand-in for TestCaseAgent._run_analysis, returning a fresh minimal result."""
+    return {
+        'similar_tests': [],
+        'claude_analysis': {'related_tests': []},
+        'duplicate_analysis': [],
+        'summary': {'total_test_cases_analyzed': 4, 'similar_tests_found': 0, 'potential_duplicates_found': 0}
+    }
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    """Runs analyses against a temporary result cache directory with Claude stubbed out."""
+    
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        patcher = mock.patch.object(agent_module, 'RESULT_CACHE_DIR', Path(tmp_dir.name) / 'cache')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.test_cases = make_test_cases(4)
+    
+    def new_agent(self, model=None):
+        """Return an agent with the test cases loaded and a mocked _run_analysis."""
+        test_agent = make_agent(model)
+        test_agent.test_cases = self.test_cases
+        test_agent._run_analysis = mock.Mock(side_effect=fake_analysis)
+        return test_agent
+    
+    def analyze(self, test_agent, bug_description="Invoice totals are wrong", **kwargs):
+        return test_agent.analyze_bug_report(
+            bug_description, "Open an invoice", "Fixed rounding", auto_load=False, **kwargs
+        )
+
+
+class TestResultCache(ResultCacheTestCase):
+    """On-disk cache of analyze_bug_report results."""
+    
+    def test_identical_inputs_hit_across_agents(self):
+        """A second agent (e.g. after a restart) reuses the stored result for identical inputs."""
+        first = self.new_agent()
+        self.assertFalse(self.analyze(first)['cached'])
+        
+        second = self.new_agent()
+        result = self.analyze(second)
+        self.assertTrue(result['cached'])
+        self.assertEqual(result['summary']['total_test_cases_analyzed'], 4)
+        second._run_analysis.assert_not_called()
+    
+    def test_inputs_and_test_cases_are_part_of_the_key(self):
+        """Different settings or different loaded test cases never reuse a result."""
+        self.analyze(self.new_agent())
+        
+        self.assertFalse(self.analyze(self.new_agent(), top_k=5)['cached'])
+        self.test_cases = make_test_cases(5)
+        self.assertFalse(self.analyze(self.new_agent())['cached'])
+    
+    def test_models_are_part_of_the_key(self):
+        """Switching the embedding model, its backend or the Claude model never reuses a result."""
+        self.analyze(self.new_agent())
+        
+        other_embeddings = self.new_agent()
+        other_embeddings._model_namespace = 'fake/onnx'
+        self.assertFalse(self.analyze(other_embeddings)['cached'])
+        
+        other_claude = self.new_agent()
+        other_claude.client.model_id = 'claude-other'
+        self.assertFalse(self.analyze(other_claude)['cached'])
+    
+    def test_expired_results_are_ignored(self):
+        """Results older than RESULT_CACHE_TTL_SECONDS are recomputed."""
+        self.analyze(self.new_agent())
+        
+        with mock.patch.object(agent_module, 'RESULT_CACHE_TTL_SECONDS', -1):
+            self.assertFalse(self.analyze(self.new_agent())['cached'])
+    
+    def test_unparsed_responses_are_not_cached(self):
+        """A result whose Claude response couldn't be parsed is retried on the next run."""
+        test_agent = self.new_agent()
+        test_agent._run_analysis.side_effect = lambda *args, **kwargs: dict(
+            fake_analysis(), claude_analysis={'raw_response': 'not JSON'}
+        )
+        self.analyze(test_agent)
+        
+        self.assertFalse(self.analyze(test_agent)['cached'])
+        self.assertEqual(test_agent._run_analysis.call_count, 2)
+
+
+
+class TestSemanticCache(ResultCacheTestCase):
+    """In-memory reuse of results for bug reports that mean nearly the same thing."""
+    
+    ORIGINAL = "Invoice totals are wrong"
+    REWORDED = "Invoice totals are incorrect"
+    DIFFERENT = "Invoice totals are slightly off"
+    OTHER = "Payments bounce"
+    OTHER_REWORDED = "Payments bounced"
+    
+    def setUp(self):
+        super().setUp()
+        # Cosine similarity to ORIGINAL: REWORDED ~0.98, DIFFERENT ~0.89 (threshold 0.95)
+        dim = 32
+        base, offset = np.eye(dim)[0], np.eye(dim)[1]
+        self.model = FakeEmbeddingModel(dim, {
+            f"{self.ORIGINAL} Open an invoice": base,
+            f"{self.REWORDED} Open an invoice": base + 0.2 * offset,
+            f"{self.DIFFERENT} Open an invoice": base + 0.5 * offset,
+            f"{self.OTHER} Open an invoice": np.eye(dim)[2],
+            f"{self.OTHER_REWORDED} Open an invoice": np.eye(dim)[2] + 0.2 * np.eye(dim)[3]
+        })
+        self.agent = self.new_agent(self.model)
+        self.analyze(self.agent, self.ORIGINAL)
+    
+    def test_near_duplicate_reuses_result(self):
+        """A reworded bug report scoring above SEMANTIC_CACHE_THRESHOLD skips the analysis."""
+        result = self.analyze(self.agent, self.REWORDED)
+        
+        self.assertTrue(result['cached'])
+        self.assertEqual(self.agent._run_analysis.call_count, 1)
+        self.assertEqual((self.agent._bug_cache_hits, self.agent._bug_cache_lookups), (1, 2))
+    
+    def test_hit_on_newer_entry_moves_it_to_the_end(self):
+        """With several entries cached, a near-duplicate of a newer one is found and becomes most recent."""
+        self.analyze(self.agent, self.OTHER)
+        
+        self.assertTrue(self.analyze(self.agent, self.OTHER_REWORDED)['cached'])
+        self.assertTrue(self.analyze(self.agent, self.REWORDED)['cached'])
+        self.assertEqual(self.agent._run_analysis.call_count, 2)
+        self.assertEqual(len(self.agent._bug_cache), 2)
+        np.testing.assert_allclose(self.agent._bug_cache[-1][0], np.eye(32)[0], atol=1e-6)
+    
+    def test_below_threshold_runs_analysis(self):
+        """A related but different bug report is analyzed again."""
+        self.assertFalse(self.analyze(self.agent, self.DIFFERENT)['cached'])
+        self.assertEqual(self.agent._run_analysis.call_count, 2)
+    
+    def test_other_parameters_never_match(self):
+        """A near-duplicate bug with different settings is analyzed again."""
+        self.assertFalse(self.analyze(self.agent, self.REWORDED, strictness='strict')['cached'])
+    
+    def test_cached_result_is_not_modified(self):
+        """Keys added to a returned result never leak into the cached copy."""
+        self.analyze(self.agent, self.REWORDED)['similar_tests'] = None
+        cached = self.agent._bug_cache[-1][2]
+        self.assertNotIn('cached', cached)
+        self.assertEqual(cached['similar_tests'], [])
+
+
+
+# A response with braces and escaped quotes inside strings, wrapped in prose that has braces too
+WRAPPED_RESPONSE = (
+    'Here is the analysis you asked for (see "notes"):\n'
+    '{"related_tests": [{"id": "1", "reason": "covers the {amount} field \\"as-is\\""}], '
+    '"notes": "path C:\\\\temp\\\\}"}\n'
+    'Let me know if you need anything else {or more detail}.'
+)
+WRAPPED_OBJECT = {
+    'related_tests': [{'id': '1', 'reason': 'covers the {amount} field "as-is"'}],
+    'notes': 'path C:\\temp\\}'
+}
+
+
+class TestJsonObjectScanner(unittest.TestCase):
+    """Finding the end of the first JSON object in a streamed response."""
+    
+    def feed_in_chunks(self, text, size):
+        """Feed text in chunks of size characters; return the text up to the object's end, or None."""
+        scanner = agent_module._JsonObjectScanner()
+        consumed = ''
+        for start in range(0, len(text), size):
+            chunk = text[start:start + size]
+            end = scanner.feed(chunk)
+            if end != -1:
+                return consumed + chunk[:end]
+            consumed += chunk
+        return None
+    
+    def test_stops_at_closing_brace_for_any_chunking(self):
+        """Braces and escaped quotes inside strings are skipped wherever the chunks split."""
+        expected_end = WRAPPED_RESPONSE.index('}"}') + 3
+        for size in (1, 2, 3, 7, 64, len(WRAPPED_RESPONSE)):
+            self.assertEqual(self.feed_in_chunks(WRAPPED_RESPONSE, size), WRAPPED_RESPONSE[:expected_end], size)
+    
+    def test_truncated_object_never_closes(self):
+        """A response cut off mid-object (e.g. at max_tokens) never reports an end."""
+        truncated = WRAPPED_RESPONSE[:WRAPPED_RESPONSE.index('"notes"')]
+        for size in (1, 5, len(truncated)):
+            self.assertIsNone(self.feed_in_chunks(truncated, size))
+    
+    def test_prose_before_object_is_ignored(self):
+        """Quotes and closing braces before the first '{' don't affect the scan."""
+        self.assertEqual(self.feed_in_chunks('He said "}" then {"a": 1} done', 4), 'He said "}" then {"a": 1}')
+
+
+class TestParseClaudeJson(unittest.TestCase):
+    """Decoding the first JSON object in a Claude response."""
+    
+    def test_prose_wrapped_object(self):
+        """Prose before and after the object, including braces, is ignored."""
+        self.assertEqual(agent_module.parse_claude_json(WRAPPED_RESPONSE), WRAPPED_OBJECT)
+    
+    def test_second_object_is_ignored(self):
+        """Only the first object is decoded when Claude returns more than one."""
+        self.assertEqual(agent_module.parse_claude_json('{"a": 1}\n{"b": 2}'), {'a': 1})
+    
+    def test_invalid_input_returns_default(self):
+        """Missing, truncated or malformed JSON returns the default instead of raising."""
+        for text in ('', 'No JSON here', '{"a": [1, 2', '{"a": 1,}', WRAPPED_RESPONSE[:60]):
+            self.assertIsNone(agent_module.parse_claude_json(text), text)
+            self.assertEqual(agent_module.parse_claude_json(text, {}), {}, text)
+
+
+
+class FakeStream:
+    """Generator-like Claude stream that records how far it was read and whether it was closed."""
+    
+    def __init__(self, chunks, on_chunk=None):
+        self.chunks = list(chunks)
+        self.on_chunk = on_chunk
+        self.read = 0
+        self.closed = False
+    
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            if self.on_chunk:
+                self.on_chunk(self.read)
+            yield chunk
+    
+    def close(self):
+        self.closed = True
+
+
+class TestCombinedAnalysis(unittest.TestCase):
+    """Bug analysis and duplicate review in a single Claude request."""
+    
+    def run_combined(self, response_text):
+        """Return (analysis, duplicates, stream_message kwargs) with Claude answering response_text."""
+        test_agent = make_agent()
+        test_agent.client = mock.Mock()
+        test_agent.client.stream_message.return_value = FakeStream([response_text])
+        test_cases = make_test_cases(2)
+        self.potential_duplicates = [
+            {'test_case_1': test_cases[0], 'test_case_2': test_cases[1], 'similarity_score': 0.95}
+        ]
+        analysis, duplicates = test_agent.analyze_bug_and_duplicates_with_claude(
+            "Totals are wrong", "Open an invoice", "Fixed rounding",
+            [(test_cases[0], 0.8)], self.potential_duplicates
+        )
+        return analysis, duplicates, test_agent.client.stream_message.call_args.kwargs
+    
+    def test_uses_larger_token_budget(self):
+        """The combined response gets COMBINED_ANALYSIS_MAX_TOKENS rather than the 4096 default."""
+        _, _, kwargs = self.run_combined('{"related_tests": [], "duplicate_groups": []}')
+        self.assertEqual(kwargs['max_tokens'], agent_module.COMBINED_ANALYSIS_MAX_TOKENS)
+    
+    def test_duplicate_groups_are_enriched(self):
+        """Claude's pair classifications are returned with the test cases they refer to."""
+        analysis, duplicates, _ = self.run_combined(
+            '{"related_tests": [], "duplicate_groups": [{"pair_id": 1, "classification": "TRUE DUPLICATES"}]}'
+        )
+        
+        self.assertNotIn('duplicate_groups', analysis)
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0]['classification'], 'TRUE DUPLICATES')
+    
+    def test_missing_duplicate_groups_falls_back(self):
+        """Without duplicate_groups in the response, the similarity-only pairs are returned."""
+        analysis, duplicates, _ = self.run_combined('{"related_tests": []}')
+        
+        self.assertEqual(analysis, {'related_tests': []})
+        self.assertEqual(duplicates, self.potential_duplicates)
+
+
+class TestCreateJsonMessage(unittest.TestCase):
+    """Streaming Claude responses: stopping at the JSON object's end, and cancellation."""
+    
+    CHUNKS = ['Sure: {"related', '_tests": []', '} and some', ' closing prose', ' nobody reads']
+    
+    def make_agent_with_stream(self, stream):
+        test_agent = make_agent()
+        test_agent.client = mock.Mock()
+        test_agent.client.stream_message.return_value = stream
+        return test_agent
+    
+    def test_stops_reading_after_object(self):
+        """Chunks after the closing brace are never read, and the stream is closed."""
+        stream = FakeStream(self.CHUNKS)
+        text = self.make_agent_with_stream(stream)._create_json_message("Instructions", "Prompt")
+        
+        self.assertEqual(text, 'Sure: {"related_tests": []}')
+        self.assertEqual(stream.read, 3)
+        self.assertTrue(stream.closed)
+    
+    def test_cancel_closes_stream(self):
+        """Setting the cancel event mid-stream raises AnalysisCancelled and closes the stream."""
+        cancel_event = threading.Event()
+        stream = FakeStream(self.CHUNKS, on_chunk=lambda read: read == 2 and cancel_event.set())
+        test_agent = self.make_agent_with_stream(stream)
+        
+        with self.assertRaises(agent_module.AnalysisCancelled):
+            test_agent._create_json_message("Instructions", "Prompt", cancel_event=cancel_event)
+        self.assertEqual(stream.read, 2)
+        self.assertTrue(stream.closed)
+    
+    def test_cancelled_before_start_never_calls_claude(self):
+        """An already cancelled request doesn't start a Claude call."""
+        cancel_event = threading.Event()
+        cancel_event.set()
+        test_agent = self.make_agent_with_stream(FakeStream(self.CHUNKS))
+        
+        with self.assertRaises(agent_module.AnalysisCancelled):
+            test_agent._create_json_message("Instructions", "Prompt", cancel_event=cancel_event)
+        test_agent.client.stream_message.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,306 @@
+import unittest
+import asyncio
+import gc
+import json
+import os
+import sys
+from unittest import mock
+
+import httpx
+
+# Add backend to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+import api
+
+WORK_ITEM = {
+    'fields': {
+        'System.Title': 'Invoice totals are wrong',
+        'System.Description': '<div>Totals&nbsp;round&nbsp;down</div>',
+        'Microsoft.VSTS.TCM.ReproSteps': '<ol><li>Open an invoice</li></ol>'
+    }
+}
+
+
+def response_json(response):
+    """Decode the body of a Response returned by an endpoint function."""
+    return json.loads(response.body)
+
+
+class ApiTestCase(unittest.TestCase):
+    """Calls endpoint functions directly, with empty lookup caches and TFS/GitHub configured."""
+    
+    def setUp(self):
+        for name, value in {
+            'TFS_BASE_URL': 'https://tfs.example.com/tfs', 'TFS_COLLECTION': 'Collection',
+            'TFS_PROJECT': 'Project', 'TFS_PAT': 'pat',
+            'GITHUB_OWNER': 'owner', 'GITHUB_REPO': 'repo'
+        }.items():
+            patcher = mock.patch.object(api, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for name in ('lookup_cache', 'pr_info_in_flight'):
+            patcher = mock.patch.object(api, name, type(getattr(api, name))())
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    def use_transport(self, handler):
+        """Route the shared HTTP client through handler(request) -> httpx.Response."""
+        patcher = mock.patch.object(api, 'http_client', httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestLookupCache(ApiTestCase):
+    """TTL cache of bug and PR lookups."""
+    
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        patcher = mock.patch.object(api.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_entries_expire_after_ttl(self):
+        """Entries are returned until LOOKUP_CACHE_TTL_SECONDS have passed, then dropped."""
+        api.cache_lookup(('bug', '1'), 'value')
+        
+        self.now += api.LOOKUP_CACHE_TTL_SECONDS - 1
+        self.assertEqual(api.get_cached_lookup(('bug', '1')), 'value')
+        self.now += 1
+        self.assertIsNone(api.get_cached_lookup(('bug', '1')))
+        self.assertNotIn(('bug', '1'), api.lookup_cache)
+    
+    def test_oldest_entries_are_evicted(self):
+        """Beyond LOOKUP_CACHE_MAX_ENTRIES the least recently stored entry goes first."""
+        with mock.patch.object(api, 'LOOKUP_CACHE_MAX_ENTRIES', 3):
+            for bug_id in '1234':
+                api.cache_lookup(('bug', bug_id), bug_id)
+            api.cache_lookup(('bug', '2'), '2')
+            api.cache_lookup(('bug', '5'), '5')
+        
+        self.assertEqual(list(api.lookup_cache), [('bug', '4'), ('bug', '2'), ('bug', '5')])
+    
+    def test_fetch_bug_info_reuses_cached_response(self):
+        """Repeated lookups within the TTL make one TFS request; expired ones fetch again."""
+        requests = []
+        
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json=WORK_ITEM)
+        
+        self.use_transport(handler)
+        
+        first = response_json(asyncio.run(api.fetch_bug_info('42')))
+        second = response_json(asyncio.run(api.fetch_bug_info('42')))
+        self.assertEqual(first, second)
+        self.assertEqual(first['description'], 'Totals round down')
+        self.assertEqual(len(requests), 1)
+        
+        self.now += api.LOOKUP_CACHE_TTL_SECONDS
+        asyncio.run(api.fetch_bug_info('42'))
+        self.assertEqual(len(requests), 2)
+    
+    def test_failed_lookups_are_not_cached(self):
+        """Errors from TFS are raised again on the next request rather than cached."""
+        self.use_transport(lambda request: httpx.Response(404))
+        
+        for _ in range(2):
+            with self.assertRaises(api.HTTPException) as raised:
+                asyncio.run(api.fetch_bug_info('404'))
+            self.assertEqual(raised.exception.status_code, 404)
+        self.assertEqual(len(api.lookup_cache), 0)
+
+
+
+def make_pr_info(pr_number):
+    return api.PRInfoResponse(
+        pr_number=pr_number, title='Fix invoice rounding', state='open', files_changed=[],
+        total_files=0, total_additions=0, total_deletions=0, summary='Rounds invoice totals correctly'
+    )
+
+
+class TestPrInfoCoalescing(ApiTestCase):
+    """Concurrent /fetch-pr-info requests for one PR share a single fetch."""
+    
+    def run_with_build(self, scenario, outcome):
+        """
+        Run scenario(release) with build_pr_info replaced by a fake that waits for release.
+        
+        Args:
+            scenario: Coroutine function taking the release event
+            outcome: Returned (or raised, if an exception) by the fake once released
+        
+        Returns:
+            (scenario result, build_pr_info call count, exception handler contexts)
+        """
+        calls = []
+        contexts = []
+        
+        async def fake_build_pr_info(pr_number):
+            calls.append(pr_number)
+            await release.wait()
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+        
+        async def main():
+            nonlocal release
+            release = asyncio.Event()
+            asyncio.get_running_loop().set_exception_handler(lambda loop, context: contexts.append(context))
+            result = await scenario(release)
+            # Unretrieved task exceptions are reported when the task is garbage collected
+            gc.collect()
+            await asyncio.sleep(0)
+            return result
+        
+        release = None
+        with mock.patch.object(api, 'build_pr_info', fake_build_pr_info):
+            result = asyncio.run(main())
+        return result, len(calls), contexts
+    
+    def test_concurrent_requests_share_one_fetch(self):
+        """Three simultaneous requests make one build_pr_info call and get the same response."""
+        async def scenario(release):
+            waiters = [asyncio.ensure_future(api.fetch_pr_info(7)) for _ in range(3)]
+            await asyncio.sleep(0)
+            release.set()
+            return await asyncio.gather(*waiters)
+        
+        responses, calls, _ = self.run_with_build(scenario, make_pr_info(7))
+        
+        self.assertEqual(calls, 1)
+        self.assertEqual({response.body for response in responses}, {responses[0].body})
+        self.assertEqual(response_json(responses[0])['pr_number'], 7)
+        self.assertEqual(api.pr_info_in_flight, {})
+        self.assertIsNotNone(api.get_cached_lookup(('pr', 'owner', 'repo', 7)))
+    
+    def test_failure_after_every_client_left_is_retrieved(self):
+        """No "Task exception was never retrieved" once all waiters have disconnected."""
+        async def scenario(release):
+            waiter = asyncio.ensure_future(api.fetch_pr_info(8))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+            release.set()
+            for _ in range(3):
+                await asyncio.sleep(0)
+        
+        _, calls, contexts = self.run_with_build(scenario, RuntimeError("GitHub unavailable"))
+        
+        self.assertEqual(calls, 1)
+        self.assertEqual(contexts, [])
+        self.assertEqual(api.pr_info_in_flight, {})
+        self.assertEqual(len(api.lookup_cache), 0)
+    
+    def test_result_is_cached_after_every_client_left(self):
+        """A fetch that finishes after its clients disconnected still serves the next request."""
+        async def scenario(release):
+            waiter = asyncio.ensure_future(api.fetch_pr_info(9))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            release.set()
+            for _ in range(3):
+                await asyncio.sleep(0)
+            return await api.fetch_pr_info(9)
+        
+        response, calls, _ = self.run_with_build(scenario, make_pr_info(9))
+        
+        self.assertEqual(calls, 1)
+        self.assertEqual(response_json(response)['pr_number'], 9)
+
+
+
+class FakeRequest:
+    """Stands in for a Starlette Request, reporting a disconnect after a number of polls."""
+    
+    def __init__(self, connected_polls=None):
+        self.connected_polls = connected_polls
+        self.polls = 0
+    
+    async def is_disconnected(self):
+        self.polls += 1
+        return self.connected_polls is not None and self.polls > self.connected_polls
+
+
+def wait_for_cancel(cancel_event):
+    """Blocking agent call that only ends when it is cancelled, like a long Claude stream."""
+    if not cancel_event.wait(timeout=5):
+        return 'finished'
+    raise api.AnalysisCancelled("Analysis cancelled")
+
+
+class TestCancellableAgentCall(unittest.TestCase):
+    """Abandoning agent work when the client disconnects."""
+    
+    def setUp(self):
+        patcher = mock.patch.object(api, 'DISCONNECT_POLL_SECONDS', 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_disconnect_sets_cancel_event(self):
+        """The worker sees the cancel event and its AnalysisCancelled reaches the caller."""
+        events = []
+        
+        def agent_call(cancel_event):
+            events.append(cancel_event)
+            return wait_for_cancel(cancel_event)
+        
+        with self.assertRaises(api.AnalysisCancelled):
+            asyncio.run(api.run_cancellable_agent_call(FakeRequest(connected_polls=2), agent_call))
+        self.assertTrue(events[0].is_set())
+    
+    def test_connected_client_gets_result(self):
+        """Without a disconnect the call's return value is passed through."""
+        def agent_call(value, cancel_event):
+            return value * 2
+        
+        self.assertEqual(asyncio.run(api.run_cancellable_agent_call(FakeRequest(), agent_call, 21)), 42)
+    
+    def test_analyze_returns_no_content_on_disconnect(self):
+        """/analyze builds no analysis response once the client has gone."""
+        fake_agent = mock.Mock()
+        fake_agent.analyze_bug_report.side_effect = lambda cancel_event, **kwargs: wait_for_cancel(cancel_event)
+        request = api.BugReportRequest(bug_description="Totals wrong", repro_steps="Open", code_changes="Fix")
+        
+        with mock.patch.object(api, 'agent', fake_agent):
+            response = asyncio.run(api.analyze_bug_report(request, api.Response(), FakeRequest(connected_polls=1)))
+        
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.body, b'')
+
+
+
+class TestParseBugContext(unittest.TestCase):
+    """Decoding Claude's structured bug context."""
+    
+    def parse(self, response_text):
+        """Run /parse-bug-context with Claude returning response_text."""
+        client = mock.Mock()
+        client.create_message.return_value = response_text
+        with mock.patch.object(api, 'check_bedrock_configured', return_value=True), \
+                mock.patch.object(api, 'get_claude_client', return_value=client):
+            return response_json(asyncio.run(api.parse_bug_context(bug_info="Totals are wrong", pr_info="")))
+    
+    def test_prose_with_braces_after_json(self):
+        """Trailing prose containing braces, or a second object, doesn't break parsing."""
+        context = self.parse(
+            'Here you go:\n{"bug_description": "Totals {net} are wrong", "repro_steps": "1. Open", '
+            '"code_changes": "Fix rounding", "confidence": "high"}\n'
+            'Note: I could also return {"alternative": true} if needed.'
+        )
+        
+        self.assertEqual(context['bug_description'], 'Totals {net} are wrong')
+        self.assertEqual(context['confidence'], 'high')
+        self.assertEqual(context['notes'], '')
+    
+    def test_unparseable_response_falls_back(self):
+        """A truncated response returns the raw input with low confidence."""
+        context = self.parse('{"bug_description": "Totals are')
+        
+        self.assertEqual(context['confidence'], 'low')
+        self.assertEqual(context['bug_description'], 'Totals are wrong')
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
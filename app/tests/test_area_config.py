@@ -0,0 +1,71 @@
+import unittest
+import os
+import random
+import sys
+from unittest import mock
+
+# Add backend to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from agent import area_config
+from agent.area_config import AREA_KEYWORDS, match_area_keywords, score_areas
+
+
+def substring_matches(text):
+    """Match keywords one area at a time with substring checks, as area detection did originally."""
+    text = text.lower()
+    matches = {}
+    for area_name, keywords in AREA_KEYWORDS.items():
+        found = sorted({keyword.lower() for keyword in keywords if keyword.lower() in text})
+        if found:
+            matches[area_name] = found
+    return matches
+
+
+def sample_texts(count=300, seed=0):
+    """Random texts mixing keywords (some glued to other words or upper-cased) with filler."""
+    rng = random.Random(seed)
+    vocabulary = sorted({keyword for keywords in AREA_KEYWORDS.values() for keyword in keywords})
+    filler = ['the', 'user', 'cannot', 'save', 'when', 'report', 'screen', 'error', 'pre', 'multi']
+    texts = [
+        "Users cannot post disbursements when the currency override is enabled",
+        "Prebill approval workflow fails in Billing for WIP entries",
+        ""
+    ]
+    for _ in range(count):
+        words = [rng.choice(vocabulary if rng.random() < 0.4 else filler) for _ in range(rng.randint(1, 25))]
+        separator = rng.choice([' ', '', '-'])
+        text = separator.join(words)
+        texts.append(text.upper() if rng.random() < 0.2 else text)
+    return texts
+
+
+class TestAreaKeywordMatching(unittest.TestCase):
+    """Single-pass keyword matching gives the same results as per-area substring checks."""
+    
+    def assert_matches_substring_search(self):
+        for text in sample_texts():
+            expected = substring_matches(text)
+            actual = {area: sorted(keywords) for area, keywords in match_area_keywords(text).items()}
+            self.assertEqual(actual, expected, text)
+            self.assertEqual(score_areas(text), {area: len(keywords) for area, keywords in expected.items()})
+    
+    def test_automaton(self):
+        """The Aho-Corasick pass finds every keyword the substring checks find, and no others."""
+        if area_config._KEYWORD_AUTOMATON is None:
+            self.skipTest("pyahocorasick is not installed")
+        self.assert_matches_substring_search()
+    
+    def test_regex_fallback(self):
+        """Overlapping and nested keywords are all found without pyahocorasick."""
+        with mock.patch.object(area_config, '_KEYWORD_AUTOMATON', None):
+            self.assert_matches_substring_search()
+    
+    def test_shared_keywords_are_weighted(self):
+        """A keyword listed for several areas counts as a fraction of a match in each."""
+        for keyword, areas in area_config.KEYWORD_AREAS.items():
+            self.assertAlmostEqual(area_config.KW_WEIGHT[keyword], 1.0 / len(areas))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
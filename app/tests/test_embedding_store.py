@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from agent.embedding_store import EmbeddingStore
+from test_agent import FakeEmbeddingModel, make_agent
+
+
+class TestEmbeddingStore(unittest.TestCase):
+    """SQLite embedding cache."""
+    
+    def setUp(self):
+        # Connections stay open until garbage collected, which Windows won't delete under
+        self.tmp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.path = Path(self.tmp_dir.name) / 'nested' / 'embeddings.sqlite3'
+        self.vectors = np.random.default_rng(0).standard_normal((3, 16)).astype(np.float32)
+        self.keys = [b'key-a', b'key-b', b'key-c']
+    
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+    
+    def test_round_trip_as_float32(self):
+        """Vectors come back as float32, equal to the originals within float16 precision."""
+        store = EmbeddingStore(self.path, 'model-a')
+        store.put_many(zip(self.keys, self.vectors))
+        
+        found = store.get_many(self.keys)
+        self.assertEqual(set(found), set(self.keys))
+        for key, vector in zip(self.keys, self.vectors):
+            self.assertEqual(found[key].dtype, np.float32)
+            np.testing.assert_allclose(found[key], vector, rtol=1e-3, atol=1e-3)
+    
+    def test_persists_across_connections(self):
+        """A new store on the same file sees earlier writes."""
+        EmbeddingStore(self.path, 'model-a').put_many(zip(self.keys, self.vectors))
+        
+        reopened = EmbeddingStore(self.path, 'model-a')
+        self.assertEqual(set(reopened.get_many(self.keys)), set(self.keys))
+    
+    def test_namespaces_are_isolated(self):
+        """Vectors from another model or storage dtype are never returned."""
+        EmbeddingStore(self.path, 'model-a').put_many(zip(self.keys, self.vectors))
+        
+        self.assertEqual(EmbeddingStore(self.path, 'model-b').get_many(self.keys), {})
+        
+        class Float32Store(EmbeddingStore):
+            STORAGE_DTYPE = np.float32
+        
+        self.assertEqual(Float32Store(self.path, 'model-a').get_many(self.keys), {})
+    
+    def test_replace_and_stats(self):
+        """put_many replaces existing entries; hits and misses are counted per key."""
+        store = EmbeddingStore(self.path, 'model-a')
+        store.put_many([(self.keys[0], self.vectors[0])])
+        store.put_many([(self.keys[0], self.vectors[1])])
+        
+        found = store.get_many(self.keys[:2])
+        np.testing.assert_allclose(found[self.keys[0]], self.vectors[1], rtol=1e-3, atol=1e-3)
+        self.assertEqual(store.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+    
+    def test_lookups_larger_than_query_chunk(self):
+        """Lookups are split to stay under SQLite's bound parameter limit."""
+        store = EmbeddingStore(self.path, 'model-a')
+        keys = [i.to_bytes(4, 'little') for i in range(EmbeddingStore._QUERY_CHUNK * 2 + 7)]
+        store.put_many((key, self.vectors[0]) for key in keys)
+        
+        self.assertEqual(len(store.get_many(keys)), len(keys))
+
+
+class TestAgentPersistentEmbeddings(unittest.TestCase):
+    """The agent reuses stored embeddings instead of re-encoding after a restart."""
+    
+    def test_restart_reads_from_store(self):
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as tmp_dir:
+            path = Path(tmp_dir) / 'embeddings.sqlite3'
+            texts = ['first text', 'second text', 'first text']
+            
+            first_model = FakeEmbeddingModel()
+            first = make_agent(first_model, EmbeddingStore(path, 'fake'))
+            expected = first.embed_batch(texts)
+            self.assertEqual(first_model.encoded, ['first text', 'second text'])
+            
+            second_model = FakeEmbeddingModel()
+            second = make_agent(second_model, EmbeddingStore(path, 'fake'))
+            np.testing.assert_allclose(second.embed_batch(texts), expected, atol=1e-3)
+            np.testing.assert_allclose(second.get_embedding('second text'), expected[1], atol=1e-3)
+            self.assertEqual(second_model.encoded, [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,95 @@
+import unittest
+import csv
+import glob
+import os
+import sys
+import tempfile
+
+# Add backend to path for importing
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'backend'))
+
+from mcp.test_case_server import read_test_cases_csv
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..', '..')
+
+HEADER = ['ID', 'Title', 'State', 'Area', 'Created Date', 'Description', 'Steps']
+
+
+def dict_reader_test_cases(csv_path):
+    """Read test cases with csv.DictReader, as the server did originally."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        return [
+            {
+                'id': row.get('ID') or '',
+                'title': row.get('Title') or '',
+                'state': row.get('State') or '',
+                'area': row.get('Area') or '',
+                'created_date': row.get('Created Date') or '',
+                'description': row.get('Description') or '',
+                'steps': row.get('Steps') or ''
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+class TestReadTestCasesCsv(unittest.TestCase):
+    """Parsing test case CSV exports."""
+    
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+    
+    def write_csv(self, rows, name='cases.csv'):
+        """Write rows (header first) with CRLF line endings, like the TFS exports."""
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            csv.writer(f).writerows(rows)
+        return path
+    
+    def test_matches_dict_reader(self):
+        """Quoting, embedded line breaks, NA-like values and IDs with leading zeros are kept as text."""
+        path = self.write_csv([
+            HEADER,
+            ['001', 'Post a bill, then reverse it', 'Design', 'Expert\\Billing', '2024-11-26T20:22:10Z',
+             'Line one\r\nLine "two"', '1. Open\r\n2. Post'],
+            ['2', 'NA', 'null', '', 'N/A', 'Café – ünïcode', ''],
+            ['3', 'Short row', 'Ready']
+        ])
+        
+        test_cases = read_test_cases_csv(path)
+        
+        self.assertEqual(test_cases, dict_reader_test_cases(path))
+        self.assertEqual(test_cases[0]['id'], '001')
+        self.assertEqual(test_cases[0]['description'], 'Line one\nLine "two"')
+        self.assertEqual(test_cases[1]['title'], 'NA')
+        self.assertEqual(test_cases[2]['steps'], '')
+    
+    def test_missing_and_extra_columns(self):
+        """Missing columns read as empty strings; unknown columns are dropped."""
+        path = self.write_csv([
+            ['Title', 'Iteration', 'ID'],
+            ['Reverse a payment', 'Sprint 4', '17']
+        ])
+        
+        self.assertEqual(read_test_cases_csv(path), [{
+            'id': '17', 'title': 'Reverse a payment', 'state': '', 'area': '',
+            'created_date': '', 'description': '', 'steps': ''
+        }])
+    
+    def test_empty_files(self):
+        """An empty file or a header without rows has no test cases."""
+        self.assertEqual(read_test_cases_csv(self.write_csv([], 'empty.csv')), [])
+        self.assertEqual(read_test_cases_csv(self.write_csv([HEADER], 'header.csv')), [])
+    
+    def test_repository_exports(self):
+        """The checked-in test case exports parse the same as with csv.DictReader."""
+        paths = sorted(glob.glob(os.path.join(REPO_ROOT, 'test_cases_*.csv')))
+        if not paths:
+            self.skipTest("no test case exports in the repository root")
+        for path in paths:
+            self.assertEqual(read_test_cases_csv(path), dict_reader_test_cases(path), path)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)